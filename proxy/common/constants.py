@@ -78,8 +78,10 @@ DEFAULT_PLUGINS = ''
 DEFAULT_PORT = 8899
 DEFAULT_SERVER_RECVBUF_SIZE = DEFAULT_BUFFER_SIZE
 DEFAULT_STATIC_SERVER_DIR = os.path.join(PROXY_PY_DIR, "public")
+DEFAULT_DISABLE_UPSTREAM_TCP_NODELAY = False
 DEFAULT_THREADLESS = False
 DEFAULT_TIMEOUT = 10
+DEFAULT_TLS_GRACEFUL_SHUTDOWN = False
 DEFAULT_VERSION = False
 DEFAULT_HTTP_PORT = 80
 DEFAULT_MAX_SEND_SIZE = 16 * 1024
@@ -26,6 +26,12 @@ from .version import __version__
 
 logger = logging.getLogger(__name__)
 
+# Certificate helpers shell out to the openssl binary instead of using
+# the python cryptography package.  proxy.py intentionally ships with
+# zero runtime dependencies, while cryptography pulls in a native
+# extension build.  The fork+exec cost is a cold-path one: callers
+# cache generated certificates per host, so openssl only runs the
+# first time a host is intercepted.
 
 DEFAULT_CONFIG = b'''[ req ]
 #default_bits		= 2048
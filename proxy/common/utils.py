@@ -12,23 +12,37 @@ import ssl
 import socket
 import logging
 import functools
-import ipaddress
 import contextlib
 
 from types import TracebackType
-from typing import Optional, Dict, Any, List, Tuple, Type, Callable
+from typing import Optional, Dict, Any, List, Tuple, Type, Callable, Union
 
 from .constants import HTTP_1_1, COLON, WHITESPACE, CRLF, DEFAULT_TIMEOUT
 from .constants import DEFAULT_LOG_FILE, DEFAULT_LOG_FORMAT, DEFAULT_LOG_LEVEL
 
 
+@functools.lru_cache(maxsize=1024)
+def _int_to_str(i: int) -> str:
+    """Cached int to str conversion.
+
+    Recurring integers (status codes, common content lengths) hit the
+    cache instead of re-converting per call."""
+    return str(i)
+
+
+@functools.lru_cache(maxsize=1024)
+def _int_to_bytes(i: int) -> bytes:
+    """Cached int to bytes conversion, see _int_to_str."""
+    return str(i).encode('ascii')
+
+
 def text_(s: Any, encoding: str = 'utf-8', errors: str = 'strict') -> Any:
     """Utility to ensure text-like usability.
 
     If s is of type bytes or int, return s.decode(encoding, errors),
     otherwise return s as it is."""
     if isinstance(s, int):
-        return str(s)
+        return _int_to_str(s)
     if isinstance(s, bytes):
         return s.decode(encoding, errors)
     return s
@@ -40,16 +54,50 @@ def bytes_(s: Any, encoding: str = 'utf-8', errors: str = 'strict') -> Any:
     If s is type str or int, return s.encode(encoding, errors),
     otherwise return s as it is."""
     if isinstance(s, int):
-        s = str(s)
+        return _int_to_bytes(s)
     if isinstance(s, str):
         return s.encode(encoding, errors)
     return s
 
 
+class HeaderList:
+    """Flat list of (key, value) header pairs.
+
+    Unlike a dict of headers, pairs are kept in insertion order without
+    hashing and presence of content-length / transfer-encoding is
+    tracked as pairs are added, so that packet builders don't need a
+    second scan over the keys.  Exposes a small dict-like surface
+    (__setitem__, items) for drop-in use with build_http_pkt."""
+
+    __slots__ = ('pairs', 'has_content_length', 'has_transfer_encoding')
+
+    def __init__(self) -> None:
+        self.pairs: List[Tuple[bytes, bytes]] = []
+        self.has_content_length: bool = False
+        self.has_transfer_encoding: bool = False
+
+    def append(self, k: bytes, v: bytes) -> None:
+        lower = k.lower()
+        if lower == b'content-length':
+            self.has_content_length = True
+        elif lower == b'transfer-encoding':
+            self.has_transfer_encoding = True
+        self.pairs.append((k, v))
+
+    def __setitem__(self, k: bytes, v: bytes) -> None:
+        self.append(k, v)
+
+    def __len__(self) -> int:
+        return len(self.pairs)
+
+    def items(self) -> List[Tuple[bytes, bytes]]:
+        return self.pairs
+
+
 def build_http_request(
     method: bytes, url: bytes,
     protocol_version: bytes = HTTP_1_1,
-    headers: Optional[Dict[bytes, bytes]] = None,
+    headers: Optional[Union[Dict[bytes, bytes], HeaderList]] = None,
     body: Optional[bytes] = None,
 ) -> bytes:
     """Build and returns a HTTP request packet."""
@@ -64,7 +112,7 @@ def build_http_response(
     status_code: int,
     protocol_version: bytes = HTTP_1_1,
     reason: Optional[bytes] = None,
-    headers: Optional[Dict[bytes, bytes]] = None,
+    headers: Optional[Union[Dict[bytes, bytes], HeaderList]] = None,
     body: Optional[bytes] = None,
 ) -> bytes:
     """Build and returns a HTTP response packet."""
@@ -73,13 +121,13 @@ def build_http_response(
         line.append(reason)
     if headers is None:
         headers = {}
-    has_content_length = False
-    has_transfer_encoding = False
-    for k in headers:
-        if k.lower() == b'content-length':
-            has_content_length = True
-        if k.lower() == b'transfer-encoding':
-            has_transfer_encoding = True
+    if isinstance(headers, HeaderList):
+        has_content_length = headers.has_content_length
+        has_transfer_encoding = headers.has_transfer_encoding
+    else:
+        lowered = {k.lower() for k in headers}
+        has_content_length = b'content-length' in lowered
+        has_transfer_encoding = b'transfer-encoding' in lowered
     if body is not None and \
             not has_transfer_encoding and \
             not has_content_length:
@@ -87,25 +135,27 @@ def build_http_response(
     return build_http_pkt(line, headers, body)
 
 
-def build_http_header(k: bytes, v: bytes) -> bytes:
+def build_http_header(
+    k: bytes, v: bytes,
+    _COLON: bytes = COLON, _WHITESPACE: bytes = WHITESPACE,
+) -> bytes:
     """Build and return a HTTP header line for use in raw packet."""
-    return k + COLON + WHITESPACE + v
+    return k + _COLON + _WHITESPACE + v
 
 
 def build_http_pkt(
     line: List[bytes],
-    headers: Optional[Dict[bytes, bytes]] = None,
+    headers: Optional[Union[Dict[bytes, bytes], HeaderList]] = None,
     body: Optional[bytes] = None,
+    _CRLF: bytes = CRLF, _WHITESPACE: bytes = WHITESPACE,
 ) -> bytes:
     """Build and returns a HTTP request or response packet."""
-    pkt = WHITESPACE.join(line) + CRLF
+    parts = [_WHITESPACE.join(line)]
     if headers is not None:
-        for k in headers:
-            pkt += build_http_header(k, headers[k]) + CRLF
-    pkt += CRLF
-    if body:
-        pkt += body
-    return pkt
+        for k, v in headers.items():
+            parts.append(build_http_header(k, v))
+    parts.append(b'')
+    return _CRLF.join(parts) + _CRLF + (body or b'')
 
 
 def build_websocket_handshake_request(
@@ -149,32 +199,46 @@ def build_websocket_handshake_response(accept: bytes) -> bytes:
     )
 
 
-def find_http_line(raw: bytes) -> Tuple[Optional[bytes], bytes]:
+def find_http_line(
+        raw: bytes, _CRLF: bytes = CRLF,
+) -> Tuple[Optional[bytes], bytes]:
     """Find and returns first line ending in CRLF along with following buffer.
 
     If no ending CRLF is found, line is None."""
-    pos = raw.find(CRLF)
-    if pos == -1:
+    line, sep, rest = raw.partition(_CRLF)
+    if not sep:
         return None, raw
-    line = raw[:pos]
-    rest = raw[pos + len(CRLF):]
     return line, rest
 
 
-def wrap_socket(
-    conn: socket.socket, keyfile: str,
-    certfile: str,
-) -> ssl.SSLSocket:
+@functools.lru_cache(maxsize=16)
+def _server_ssl_context(keyfile: str, certfile: str) -> ssl.SSLContext:
+    """Server side SSLContext for a (keyfile, certfile) pair.
+
+    Context construction and certificate parsing are expensive, hence
+    cached and shared by all connections wrapped with the same pair.
+    Context reuse also allows session resumption across handshakes."""
     ctx = ssl.create_default_context(
         ssl.Purpose.CLIENT_AUTH,
     )
-    ctx.options |= ssl.OP_NO_SSLv2 | ssl.OP_NO_SSLv3 | ssl.OP_NO_TLSv1 | ssl.OP_NO_TLSv1_1
+    # Subsumes the previous OP_NO_SSLv* / OP_NO_TLSv1* options.  Session
+    # tickets stay enabled (the default), so clients reconnecting to a
+    # shared context can resume instead of paying a full handshake.
+    ctx.minimum_version = ssl.TLSVersion.TLSv1_2
+    ctx.maximum_version = ssl.TLSVersion.TLSv1_3
     ctx.verify_mode = ssl.CERT_NONE
     ctx.load_cert_chain(
         certfile=certfile,
         keyfile=keyfile,
     )
-    return ctx.wrap_socket(
+    return ctx
+
+
+def wrap_socket(
+    conn: socket.socket, keyfile: str,
+    certfile: str,
+) -> ssl.SSLSocket:
+    return _server_ssl_context(keyfile, certfile).wrap_socket(
         conn,
         server_side=True,
     )
@@ -183,25 +247,27 @@ def wrap_socket(
 def new_socket_connection(
         addr: Tuple[str, int], timeout: int = DEFAULT_TIMEOUT,
 ) -> socket.socket:
-    conn = None
+    # C-level literal address check, much cheaper
+    # than constructing an ipaddress object.
+    family: Optional[socket.AddressFamily] = None
     try:
-        ip = ipaddress.ip_address(addr[0])
-        if ip.version == 4:
-            conn = socket.socket(
-                socket.AF_INET, socket.SOCK_STREAM, 0,
-            )
-            conn.settimeout(timeout)
-            conn.connect(addr)
-        else:
-            conn = socket.socket(
-                socket.AF_INET6, socket.SOCK_STREAM, 0,
-            )
-            conn.settimeout(timeout)
-            conn.connect((addr[0], addr[1], 0, 0))
-    except ValueError:
-        pass    # does not appear to be an IPv4 or IPv6 address
-
-    if conn is not None:
+        socket.inet_pton(socket.AF_INET, addr[0])
+        family = socket.AF_INET
+    except OSError:
+        try:
+            socket.inet_pton(socket.AF_INET6, addr[0])
+            family = socket.AF_INET6
+        except OSError:
+            pass    # does not appear to be an IPv4 or IPv6 address
+
+    if family is not None:
+        conn = socket.socket(
+            family, socket.SOCK_STREAM, 0,
+        )
+        conn.settimeout(timeout)
+        conn.connect(
+            addr if family == socket.AF_INET else (addr[0], addr[1], 0, 0),
+        )
         return conn
 
     # try to establish dual stack IPv4/IPv6 connection.
@@ -68,6 +68,11 @@ class Threadless(multiprocessing.Process):
         self.works: Dict[int, Work] = {}
         self.selector: Optional[selectors.DefaultSelector] = None
         self.loop: Optional[asyncio.AbstractEventLoop] = None
+        # Work descriptors currently registered on the shared selector
+        # along with their event masks.  Kept across run_once iterations
+        # so that the worker only issues epoll_ctl syscalls when the
+        # interest mask of a descriptor actually changes.
+        self._registered: Dict[socket.socket, int] = {}
 
     @contextlib.contextmanager
     def selected_events(self) -> Generator[
@@ -78,8 +83,21 @@ class Threadless(multiprocessing.Process):
         for work in self.works.values():
             events.update(work.get_events())
         assert self.selector is not None
-        for fd in events:
-            self.selector.register(fd, events[fd])
+        # Unregister descriptors which are no longer of interest
+        for fd in list(self._registered):
+            if fd not in events:
+                self.selector.unregister(fd)
+                del self._registered[fd]
+        # Register new descriptors, modify existing ones
+        # only when the interest mask has changed
+        for fd, mask in events.items():
+            registered_mask = self._registered.get(fd)
+            if registered_mask is None:
+                self.selector.register(fd, mask)
+                self._registered[fd] = mask
+            elif registered_mask != mask:
+                self.selector.modify(fd, mask)
+                self._registered[fd] = mask
         ev = self.selector.select(timeout=1)
         readables = []
         writables = []
@@ -89,8 +107,6 @@ class Threadless(multiprocessing.Process):
             if mask & selectors.EVENT_WRITE:
                 writables.append(key.fileobj)
         yield (readables, writables)
-        for fd in events:
-            self.selector.unregister(fd)
 
     async def handle_events(
             self, fileno: int,
@@ -13,6 +13,7 @@ import ssl
 from typing import Union, Tuple, Optional
 
 from .connection import TcpConnection, tcpConnectionTypes, TcpConnectionUninitializedException
+from ...common.utils import wrap_socket
 
 
 class TcpClientConnection(TcpConnection):
@@ -36,12 +37,8 @@ class TcpClientConnection(TcpConnection):
     def wrap(self, keyfile: str, certfile: str) -> None:
         self.connection.setblocking(True)
         self.flush()
-        self._conn = ssl.wrap_socket(
-            self.connection,
-            server_side=True,
-            # ca_certs=self.flags.ca_cert_file,
-            certfile=certfile,
-            keyfile=keyfile,
-            ssl_version=ssl.PROTOCOL_TLS,
-        )
+        # Reuses the cached per (keyfile, certfile) context instead
+        # of the deprecated ssl.wrap_socket, which constructed a fresh
+        # context per connection.
+        self._conn = wrap_socket(self.connection, keyfile, certfile)
         self.connection.setblocking(False)
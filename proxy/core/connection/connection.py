@@ -12,12 +12,22 @@ import socket
 import ssl
 import logging
 from abc import ABC, abstractmethod
-from typing import NamedTuple, Optional, Union, List
+from collections import deque
+from itertools import islice
+from typing import NamedTuple, Optional, Union, Deque
 
 from ...common.constants import DEFAULT_BUFFER_SIZE, DEFAULT_MAX_SEND_SIZE
 
 logger = logging.getLogger(__name__)
 
+# Detected once at import.  sendmsg allows the kernel to drain
+# multiple queued chunks within a single syscall.
+_has_sendmsg = hasattr(socket.socket, 'sendmsg')
+
+# Kernels cap the iovec count per sendmsg call (IOV_MAX, 1024 on
+# Linux); passing more fails with EMSGSIZE instead of short-writing.
+_IOV_MAX = 1024
+
 
 TcpConnectionTypes = NamedTuple(
     'TcpConnectionTypes', [
@@ -42,7 +52,9 @@ class TcpConnection(ABC):
     a socket connection object."""
 
     def __init__(self, tag: int):
-        self.buffer: List[memoryview] = []
+        # deque so that flush trims consumed chunks from the head
+        # in O(1) instead of list.pop(0)'s O(n) shuffle.
+        self.buffer: Deque[memoryview] = deque()
         self.closed: bool = False
         self.tag: str = 'server' if tag == tcpConnectionTypes.SERVER else 'client'
 
@@ -70,6 +82,23 @@ class TcpConnection(ABC):
         # logger.info(data)
         return memoryview(data)
 
+    def recv_into(self, buf: bytearray) -> Optional[memoryview]:
+        """Receive into a caller provided buffer, avoiding the
+        per-recv bytes allocation made by recv.
+
+        Returned memoryview points into buf and is only valid
+        until the next recv_into on the same buffer.
+
+        Users must handle socket.error exceptions"""
+        bytes_recvd: int = self.connection.recv_into(buf)
+        if bytes_recvd == 0:
+            return None
+        logger.debug(
+            'received %d bytes from %s' %
+            (bytes_recvd, self.tag),
+        )
+        return memoryview(buf)[:bytes_recvd]
+
     def close(self) -> bool:
         if not self.closed:
             self.connection.close()
@@ -86,12 +115,34 @@ class TcpConnection(ABC):
         """Users must handle BrokenPipeError exceptions"""
         if not self.has_buffer():
             return 0
-        mv = self.buffer[0].tobytes()
-        sent: int = self.send(mv[:DEFAULT_MAX_SEND_SIZE])
-        if sent == len(mv):
-            self.buffer.pop(0)
+        if _has_sendmsg and len(self.buffer) > 1 and \
+                not isinstance(self.connection, ssl.SSLSocket):
+            # Vectored write, queued chunks in a single syscall, capped
+            # at the kernel's iovec limit; anything beyond waits for
+            # the next flush.  ssl sockets don't implement sendmsg,
+            # they keep using the send path below.  Unlike that path,
+            # no DEFAULT_MAX_SEND_SIZE byte cap applies here on
+            # purpose: a non-blocking sendmsg stops at whatever the
+            # socket buffer accepts and reports the short write.
+            sent: int = self.connection.sendmsg(
+                list(islice(self.buffer, _IOV_MAX)),
+            )
+            remaining = sent
+            while remaining > 0:
+                chunk = self.buffer[0]
+                if remaining >= len(chunk):
+                    remaining -= len(chunk)
+                    self.buffer.popleft()
+                else:
+                    self.buffer[0] = chunk[remaining:]
+                    remaining = 0
         else:
-            self.buffer[0] = memoryview(mv[sent:])
-        del mv
+            mv = self.buffer[0].tobytes()
+            sent = self.send(mv[:DEFAULT_MAX_SEND_SIZE])
+            if sent == len(mv):
+                self.buffer.popleft()
+            else:
+                self.buffer[0] = memoryview(mv[sent:])
+            del mv
         logger.debug('flushed %d bytes to %s' % (sent, self.tag))
         return sent
@@ -11,12 +11,27 @@
 import os
 import threading
 import time
-from typing import Dict, Optional, Any
+from typing import Callable, Dict, Optional, Any
 
 from ...common.types import DictQueueType
 
 from .names import eventNames
 
+# Pid is constant for the lifetime of a process.  Cache it once per
+# process instead of calling os.getpid() for every published event.
+# Acceptor workers inherit this module via fork, hence re-cache in
+# forked children.  Spawned children re-import and cache afresh.
+_publisher_pid: int = os.getpid()
+
+
+def _recache_publisher_pid() -> None:
+    global _publisher_pid
+    _publisher_pid = os.getpid()
+
+
+if hasattr(os, 'register_at_fork'):    # pragma: no cover
+    os.register_at_fork(after_in_child=_recache_publisher_pid)
+
 
 class EventQueue:
     """Global event queue.  Ideally the queue must come from multiprocessing.Manager,
@@ -46,11 +61,12 @@ class EventQueue:
         event_name: int,
         event_payload: Dict[str, Any],
         publisher_id: Optional[str] = None,
+        _get_ident: Callable[[], int] = threading.get_ident,
     ) -> None:
         self.queue.put({
             'request_id': request_id,
-            'process_id': os.getpid(),
-            'thread_id': threading.get_ident(),
+            'process_id': _publisher_pid,
+            'thread_id': _get_ident(),
             'event_timestamp': time.time(),
             'event_name': event_name,
             'event_payload': event_payload,
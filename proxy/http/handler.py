@@ -10,6 +10,7 @@
 """
 import argparse
 import socket
+import select
 import selectors
 import ssl
 import time
@@ -31,6 +32,7 @@ from ..core.event import EventQueue
 from ..core.connection import TcpClientConnection
 from ..common.flag import flags
 from ..common.constants import DEFAULT_CLIENT_RECVBUF_SIZE, DEFAULT_KEY_FILE, DEFAULT_TIMEOUT
+from ..common.constants import DEFAULT_TLS_GRACEFUL_SHUTDOWN
 
 
 logger = logging.getLogger(__name__)
@@ -61,6 +63,15 @@ flags.add_argument(
     'an inactive connection must be dropped.  Inactivity is defined by no '
     'data sent or received by the client.',
 )
+flags.add_argument(
+    '--tls-graceful-shutdown',
+    action='store_true',
+    default=DEFAULT_TLS_GRACEFUL_SHUTDOWN,
+    help='Default: False.  Perform a TLS close_notify exchange (unwrap) '
+    'before shutting down client connections wrapped with '
+    '--key-file / --cert-file.  Unwrap adds an extra network round '
+    'trip per teardown and is unnecessary for most clients.',
+)
 
 
 class HttpProtocolHandler(Work):
@@ -77,13 +88,32 @@ class HttpProtocolHandler(Work):
     ):
         super().__init__(client, flags, event_queue, uid)
 
-        self.start_time: float = time.time()
+        self.start_time: float = time.monotonic()
         self.last_activity: float = self.start_time
+        # Inactivity deadline, maintained alongside last_activity so
+        # that is_inactive is a single clock read and comparison
+        # instead of a subtraction against a flags attribute lookup.
+        self._timeout: float = flags.timeout
+        self._deadline: float = self.last_activity + self._timeout
         self.request: HttpParser = HttpParser(httpParserTypes.REQUEST_PARSER)
         self.response: HttpParser = HttpParser(httpParserTypes.RESPONSE_PARSER)
         self.selector = selectors.DefaultSelector()
         self.client: TcpClientConnection = client
         self.plugins: Dict[str, HttpProtocolHandlerPlugin] = {}
+        # Reused across recv calls to avoid a fresh client_recvbuf_size
+        # bytes allocation per read.
+        self._recvbuf: bytearray = bytearray(flags.client_recvbuf_size)
+        # Currently registered work descriptors and their event masks.
+        # Registrations are kept across run_once iterations and only
+        # modified when the interest mask actually changes, avoiding
+        # a register + unregister syscall pair per descriptor per tick.
+        self._registered: Dict[socket.socket, int] = {}
+        # Events dict reused across get_events calls, cleared in-place
+        # instead of re-allocated per tick.
+        self._events_buf: Dict[socket.socket, int] = {}
+        # Frozen plugin iteration order, built once in initialize.
+        # Avoids allocating a dict_values view per hot-path loop.
+        self._plugin_list: Tuple[HttpProtocolHandlerPlugin, ...] = ()
 
     def encryption_enabled(self) -> bool:
         return self.flags.keyfile is not None and \
@@ -119,33 +149,30 @@ class HttpProtocolHandler(Work):
                     self.event_queue,
                 )
                 self.plugins[instance.name()] = instance
-        logger.debug('Handling connection %r' % self.client.connection)
+        self._plugin_list = tuple(self.plugins.values())
+        logger.debug('Handling connection %r', self.client.connection)
 
     def is_inactive(self) -> bool:
-        if not self.client.has_buffer() and \
-                self.connection_inactive_for() > self.flags.timeout:
-            return True
-        return False
+        return not self.client.has_buffer() and \
+            time.monotonic() >= self._deadline
 
-    def get_events(self) -> Dict[socket.socket, int]:
-        events: Dict[socket.socket, int] = {
-            self.client.connection: selectors.EVENT_READ,
-        }
-        if self.client.has_buffer():
-            events[self.client.connection] |= selectors.EVENT_WRITE
+    def get_events(
+            self,
+            _read: int = selectors.EVENT_READ,
+            _write: int = selectors.EVENT_WRITE,
+    ) -> Dict[socket.socket, int]:
+        events = self._events_buf
+        events.clear()
+        events[self.client.connection] = _read \
+            if not self.client.has_buffer() \
+            else _read | _write
         # HttpProtocolHandlerPlugin.get_descriptors
-        for plugin in self.plugins.values():
+        for plugin in self._plugin_list:
             plugin_read_desc, plugin_write_desc = plugin.get_descriptors()
             for r in plugin_read_desc:
-                if r not in events:
-                    events[r] = selectors.EVENT_READ
-                else:
-                    events[r] |= selectors.EVENT_READ
+                events[r] = events.get(r, 0) | _read
             for w in plugin_write_desc:
-                if w not in events:
-                    events[w] = selectors.EVENT_WRITE
-                else:
-                    events[w] |= selectors.EVENT_WRITE
+                events[w] = events.get(w, 0) | _write
         return events
 
     def handle_events(
@@ -160,7 +187,7 @@ class HttpProtocolHandler(Work):
             return True
 
         # Invoke plugin.write_to_descriptors
-        for plugin in self.plugins.values():
+        for plugin in self._plugin_list:
             teardown = plugin.write_to_descriptors(writables)
             if teardown:
                 return True
@@ -171,7 +198,7 @@ class HttpProtocolHandler(Work):
             return True
 
         # Invoke plugin.read_from_descriptors
-        for plugin in self.plugins.values():
+        for plugin in self._plugin_list:
             teardown = plugin.read_from_descriptors(readables)
             if teardown:
                 return True
@@ -180,22 +207,34 @@ class HttpProtocolHandler(Work):
 
     def shutdown(self) -> None:
         try:
+            # Unregister any still registered descriptors before flush
+            # re-registers the client connection for writes.
+            for fd in self._registered:
+                try:
+                    self.selector.unregister(fd)
+                except KeyError:
+                    pass
+            self._registered.clear()
+
             # Flush pending buffer if any
             self.flush()
 
             # Invoke plugin.on_client_connection_close
-            for plugin in self.plugins.values():
+            for plugin in self._plugin_list:
                 plugin.on_client_connection_close()
 
             logger.debug(
                 'Closing client connection %r '
-                'at address %r has buffer %s' %
-                (self.client.connection, self.client.addr, self.client.has_buffer()),
+                'at address %r has buffer %s',
+                self.client.connection, self.client.addr, self.client.has_buffer(),
             )
 
             conn = self.client.connection
-            # Unwrap if wrapped before shutdown.
-            if self.encryption_enabled() and \
+            # Unwrap, i.e. exchange close_notify, only when graceful
+            # TLS shutdown was requested.  TCP teardown below is enough
+            # for well behaved clients and skips a blocking round trip.
+            if self.flags.tls_graceful_shutdown and \
+                    self.encryption_enabled() and \
                     isinstance(self.client.connection, ssl.SSLSocket):
                 conn = self.client.connection.unwrap()
             conn.shutdown(socket.SHUT_WR)
@@ -208,38 +247,43 @@ class HttpProtocolHandler(Work):
             super().shutdown()
 
     def connection_inactive_for(self) -> float:
-        return time.time() - self.last_activity
+        return time.monotonic() - self.last_activity
+
+    def update_last_activity(self) -> None:
+        # Inactivity is judged at whole second granularity by
+        # is_inactive.  Skip the clock read's float allocation for
+        # back-to-back events within a quarter second window.
+        now = time.monotonic()
+        if now - self.last_activity > 0.25:
+            self.last_activity = now
+            self._deadline = now + self._timeout
 
     def flush(self) -> None:
         if not self.client.has_buffer():
             return
         try:
-            self.selector.register(
-                self.client.connection,
-                selectors.EVENT_WRITE,
-            )
+            # Shutdown path waits on a single descriptor, a plain
+            # select is enough here and skips the selector
+            # register / unregister epoll_ctl churn.
+            conn = self.client.connection
             while self.client.has_buffer():
-                ev: List[
-                    Tuple[selectors.SelectorKey, int]
-                ] = self.selector.select(timeout=1)
-                if len(ev) == 0:
+                _, writables, _ = select.select([], [conn], [], 1)
+                if len(writables) == 0:
                     continue
                 self.client.flush()
         except BrokenPipeError:
             pass
-        finally:
-            self.selector.unregister(self.client.connection)
 
     def handle_writables(self, writables: Writables) -> bool:
         if self.client.has_buffer() and self.client.connection in writables:
             logger.debug('Client is ready for writes, flushing buffer')
-            self.last_activity = time.time()
+            self.update_last_activity()
 
             # TODO(abhinavsingh): This hook could just reside within server recv block
             # instead of invoking when flushed to client.
             # Invoke plugin.on_response_chunk
             chunk = self.client.buffer
-            for plugin in self.plugins.values():
+            for plugin in self._plugin_list:
                 chunk = plugin.on_response_chunk(chunk)
                 if chunk is None:
                     break
@@ -259,9 +303,14 @@ class HttpProtocolHandler(Work):
     def handle_readables(self, readables: Readables) -> bool:
         if self.client.connection in readables:
             logger.debug('Client is ready for reads, reading')
-            self.last_activity = time.time()
+            self.update_last_activity()
             try:
-                client_data = self.client.recv(self.flags.client_recvbuf_size)
+                client_data = self.client.recv_into(self._recvbuf)
+                # Snapshot out of the shared receive buffer before data is
+                # handed to plugins, which may hold on to the view (e.g.
+                # queue it for upstream) past the next recv_into.
+                if client_data is not None:
+                    client_data = memoryview(bytes(client_data))
             except ssl.SSLWantReadError:    # Try again later
                 logger.warning(
                     'SSLWantReadError encountered while reading from client, will retry ...',
@@ -269,11 +318,11 @@ class HttpProtocolHandler(Work):
                 return False
             except socket.error as e:
                 if e.errno == errno.ECONNRESET:
-                    logger.warning('%r' % e)
+                    logger.warning('%r', e)
                 else:
                     logger.exception(
-                        'Exception while receiving from %s connection %r with reason %r' %
-                        (self.client.tag, self.client.connection, e),
+                        'Exception while receiving from %s connection %r with reason %r',
+                        self.client.tag, self.client.connection, e,
                     )
                 return True
 
@@ -285,7 +334,7 @@ class HttpProtocolHandler(Work):
             try:
                 # HttpProtocolHandlerPlugin.on_client_data
                 # Can raise HttpProtocolException to teardown the connection
-                for plugin in self.plugins.values():
+                for plugin in self._plugin_list:
                     client_data = plugin.on_client_data(client_data)
                     if client_data is None:
                         break
@@ -299,19 +348,17 @@ class HttpProtocolHandler(Work):
                 # valid request.
                 if client_data and self.request.state != httpParserStates.COMPLETE:
                     # Parse http request
-                    # TODO(abhinavsingh): Remove .tobytes after parser is
-                    # memoryview compliant
-                    self.request.parse(client_data.tobytes())
+                    self.request.parse(client_data)
                     if self.request.state == httpParserStates.COMPLETE:
                         # Invoke plugin.on_request_complete
-                        for plugin in self.plugins.values():
+                        for plugin in self._plugin_list:
                             upgraded_sock = plugin.on_request_complete()
                             if isinstance(upgraded_sock, ssl.SSLSocket):
                                 logger.debug(
                                     'Updated client conn to %s', upgraded_sock,
                                 )
                                 self.client._conn = upgraded_sock
-                                for plugin_ in self.plugins.values():
+                                for plugin_ in self._plugin_list:
                                     if plugin_ != plugin:
                                         plugin_.client._conn = upgraded_sock
                             elif isinstance(upgraded_sock, bool) and upgraded_sock is True:
@@ -333,19 +380,31 @@ class HttpProtocolHandler(Work):
                 None, None,
             ]:
         events = self.get_events()
-        for fd in events:
-            self.selector.register(fd, events[fd])
+        # Unregister descriptors which are no longer of interest
+        for fd in list(self._registered):
+            if fd not in events:
+                self.selector.unregister(fd)
+                del self._registered[fd]
+        # Register new descriptors, modify existing ones
+        # only when the interest mask has changed
+        for fd, mask in events.items():
+            registered_mask = self._registered.get(fd)
+            if registered_mask is None:
+                self.selector.register(fd, mask)
+                self._registered[fd] = mask
+            elif registered_mask != mask:
+                self.selector.modify(fd, mask)
+                self._registered[fd] = mask
         ev = self.selector.select(timeout=1)
         readables = []
         writables = []
+        _read, _write = selectors.EVENT_READ, selectors.EVENT_WRITE
         for key, mask in ev:
-            if mask & selectors.EVENT_READ:
+            if mask & _read:
                 readables.append(key.fileobj)
-            if mask & selectors.EVENT_WRITE:
+            if mask & _write:
                 writables.append(key.fileobj)
         yield (readables, writables)
-        for fd in events:
-            self.selector.unregister(fd)
 
     def run_once(self) -> bool:
         with self.selected_events() as (readables, writables):
@@ -374,7 +433,7 @@ class HttpProtocolHandler(Work):
             logger.exception('ssl.SSLError', exc_info=e)
         except Exception as e:
             logger.exception(
-                'Exception while handling connection %r' %
+                'Exception while handling connection %r',
                 self.client.connection, exc_info=e,
             )
         finally:
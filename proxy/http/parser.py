@@ -9,13 +9,13 @@
     :license: BSD, see LICENSE for more details.
 """
 from urllib import parse as urlparse
-from typing import TypeVar, NamedTuple, Optional, Dict, Type, Tuple, List
+from typing import TypeVar, NamedTuple, Optional, Dict, Type, Tuple, List, Union, FrozenSet
 
 from .methods import httpMethods
 from .chunk_parser import ChunkParser, chunkParserStates
 
 from ..common.constants import DEFAULT_DISABLE_HEADERS, COLON, SLASH, CRLF, WHITESPACE, HTTP_1_1, DEFAULT_HTTP_PORT
-from ..common.utils import build_http_request, build_http_response, find_http_line, text_
+from ..common.utils import HeaderList, build_http_request, build_http_response, find_http_line, text_
 
 
 HttpParserStates = NamedTuple(
@@ -41,6 +41,12 @@ httpParserTypes = HttpParserTypes(1, 2)
 
 T = TypeVar('T', bound='HttpParser')
 
+# frozenset counterpart of DEFAULT_DISABLE_HEADERS, matching the
+# post-processed flags.disable_headers type used by build.
+_DEFAULT_DISABLE_HEADERS: FrozenSet[bytes] = frozenset(
+    DEFAULT_DISABLE_HEADERS,
+)
+
 
 class HttpParser:
     """HTTP request/response parser."""
@@ -73,6 +79,23 @@ class HttpParser:
         self.port: Optional[int] = None
         self.path: Optional[bytes] = None
 
+    def reset(self) -> None:
+        """Reset parser state in-place, allowing instance reuse."""
+        self.state = httpParserStates.INITIALIZED
+        self.total_size = 0
+        self.buffer = b''
+        self.headers.clear()
+        self.body = None
+        self.method = None
+        self.url = None
+        self.code = None
+        self.reason = None
+        self.version = None
+        self.chunk_parser = None
+        self.host = None
+        self.port = None
+        self.path = None
+
     @classmethod
     def request(cls: Type[T], raw: bytes) -> T:
         parser = cls(httpParserTypes.REQUEST_PARSER)
@@ -145,13 +168,22 @@ class HttpParser:
         ) or \
             self.is_chunked_encoded()
 
-    def parse(self, raw: bytes) -> None:
+    def parse(self, raw: Union[bytes, memoryview]) -> None:
         """Parses Http request out of raw bytes.
 
+        Also accepts a memoryview, so that callers receiving views
+        over their recv buffers can pass them along as-is.
+
         Check HttpParser state after parse has successfully returned."""
+        if isinstance(raw, memoryview):
+            raw = raw.tobytes()
         self.total_size += len(raw)
-        raw = self.buffer + raw
-        self.buffer = b''
+        # Concatenate only when a previous packet left unparsed bytes
+        # behind; the common case prepends an empty buffer, which
+        # would still copy the whole packet.
+        if self.buffer:
+            raw = self.buffer + raw
+            self.buffer = b''
 
         more = len(raw) > 0
         while more and self.state != httpParserStates.COMPLETE:
@@ -246,11 +278,22 @@ class HttpParser:
             url += b'#' + self.url.fragment
         return url
 
-    def build(self, disable_headers: Optional[List[bytes]] = None, for_proxy: bool = False) -> bytes:
-        """Rebuild the request object."""
+    def build(
+            self,
+            disable_headers: Optional[FrozenSet[bytes]] = None,
+            for_proxy: bool = False,
+            add_headers: Optional[List[Tuple[bytes, bytes]]] = None,
+            del_headers: Optional[FrozenSet[bytes]] = None,
+    ) -> bytes:
+        """Rebuild the request object.
+
+        add_headers / del_headers apply only to the serialized output,
+        leaving parser state untouched.  Passing them here folds what
+        would otherwise be separate del_headers/add_headers walks into
+        the single serialization pass over the header store."""
         assert self.method and self.version and self.path and self.type == httpParserTypes.REQUEST_PARSER
         if disable_headers is None:
-            disable_headers = DEFAULT_DISABLE_HEADERS
+            disable_headers = _DEFAULT_DISABLE_HEADERS
         body: Optional[bytes] = ChunkParser.to_chunks(self.body) \
             if self.is_chunked_encoded() and self.body else \
             self.body
@@ -266,25 +309,37 @@ class HttpParser:
                 self.path
             ) if self.method != httpMethods.CONNECT else (self.host + COLON + str(self.port).encode())
 
+        headers: Dict[bytes, bytes] = {}
+        for k in self.headers:
+            if k in disable_headers or \
+                    (del_headers is not None and k in del_headers):
+                continue
+            headers[self.headers[k][0]] = self.headers[k][1]
+        if add_headers is not None:
+            for key, value in add_headers:
+                headers[key] = value
+
         return build_http_request(
             self.method, path, self.version,
-            headers={} if not self.headers else {
-                self.headers[k][0]: self.headers[k][1] for k in self.headers if
-                k.lower() not in disable_headers
-            },
+            headers=headers,
             body=body,
         )
 
     def build_response(self) -> bytes:
         """Rebuild the response object."""
         assert self.code and self.version and self.body and self.type == httpParserTypes.RESPONSE_PARSER
+        # HeaderList tracks content-length / transfer-encoding as
+        # pairs are added, sparing build_http_response its second scan
+        # over the keys.  Parsed header keys are already unique, so
+        # append-only semantics are safe here.
+        headers = HeaderList()
+        for k in self.headers:
+            headers.append(self.headers[k][0], self.headers[k][1])
         return build_http_response(
             status_code=int(self.code),
             protocol_version=self.version,
             reason=self.reason,
-            headers={} if not self.headers else {
-                self.headers[k][0]: self.headers[k][1] for k in self.headers
-            },
+            headers=headers,
             body=self.body if not self.is_chunked_encoded() else ChunkParser.to_chunks(self.body),
         )
 
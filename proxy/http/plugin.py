@@ -13,7 +13,7 @@ import socket
 
 from abc import ABC, abstractmethod
 from uuid import UUID
-from typing import Tuple, List, Union, Optional
+from typing import Tuple, List, Deque, Union, Optional
 
 from .parser import HttpParser
 
@@ -99,7 +99,7 @@ class HttpProtocolHandlerPlugin(ABC):
         return False  # pragma: no cover
 
     @abstractmethod
-    def on_response_chunk(self, chunk: List[memoryview]) -> List[memoryview]:
+    def on_response_chunk(self, chunk: Deque[memoryview]) -> Deque[memoryview]:
         """Handle data chunks as received from the server.
 
         Return optionally modified chunk to return back to client."""
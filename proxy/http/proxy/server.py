@@ -13,11 +13,20 @@ import ssl
 import time
 import errno
 import socket
+import string
 import logging
 import threading
 import subprocess
 
-from typing import Optional, List, Union, Dict, cast, Any, Tuple
+try:
+    import fcntl
+except ImportError:     # pragma: no cover
+    # Windows.  Cross-process cert generation races then fall back to
+    # the openssl invocations being idempotent per host.
+    fcntl = None    # type: ignore[assignment]
+
+from collections import deque
+from typing import Optional, List, Deque, Union, Dict, cast, Any, Tuple
 
 from .plugin import HttpProxyBasePlugin
 from ..plugin import HttpProtocolHandlerPlugin
@@ -32,6 +41,7 @@ from ...common.constants import DEFAULT_CA_KEY_FILE, DEFAULT_CA_SIGNING_KEY_FILE
 from ...common.constants import COMMA, DEFAULT_SERVER_RECVBUF_SIZE, DEFAULT_CERT_FILE
 from ...common.constants import PROXY_AGENT_HEADER_VALUE, DEFAULT_DISABLE_HEADERS
 from ...common.constants import DEFAULT_HTTP_ACCESS_LOG_FORMAT, DEFAULT_HTTPS_ACCESS_LOG_FORMAT
+from ...common.constants import DEFAULT_DISABLE_UPSTREAM_TCP_NODELAY
 from ...common.utils import build_http_response, text_
 from ...common.pki import gen_public_key, gen_csr, sign_csr
 
@@ -41,6 +51,67 @@ from ...common.flag import flags
 
 logger = logging.getLogger(__name__)
 
+# Access log templates pre-parsed at import.  format_map re-parses
+# the template string on every closed connection.
+_HTTP_LOG_FORMAT = list(
+    string.Formatter().parse(DEFAULT_HTTP_ACCESS_LOG_FORMAT),
+)
+_HTTPS_LOG_FORMAT = list(
+    string.Formatter().parse(DEFAULT_HTTPS_ACCESS_LOG_FORMAT),
+)
+
+
+# Maps openssl subject short names to the corresponding field names
+# found in getpeercert() subjects.
+_SUBJECT_KEYS = (
+    ('CN', 'commonName'),
+    ('C', 'countryName'),
+    ('ST', 'stateOrProvinceName'),
+    ('L', 'localityName'),
+    ('O', 'organizationName'),
+    ('OU', 'organizationalUnitName'),
+)
+
+# Request rewrite constants, built once instead of a fresh list and
+# bytes format per proxied request.
+_VIA_HEADER = [(b'Via', b'1.1 ' + PROXY_AGENT_HEADER_VALUE)]
+_DROP_HEADERS = frozenset([b'proxy-authorization', b'proxy-connection'])
+
+
+# Bounded free lists of HttpParser instances keyed by parser type.
+# Short lived proxied connections otherwise allocate a response parser
+# (and often pipeline parsers) per connection.  deque append/popleft
+# are atomic, so the pool needs no lock even with threaded workers.
+_PARSER_POOL_SIZE = 256
+_PARSER_POOL: Dict[int, Deque[HttpParser]] = {
+    httpParserTypes.REQUEST_PARSER: deque(),
+    httpParserTypes.RESPONSE_PARSER: deque(),
+}
+
+
+def _acquire_parser(parser_type: int) -> HttpParser:
+    try:
+        return _PARSER_POOL[parser_type].popleft()
+    except IndexError:
+        return HttpParser(parser_type)
+
+
+def _release_parser(parser: HttpParser) -> None:
+    pool = _PARSER_POOL[parser.type]
+    if len(pool) < _PARSER_POOL_SIZE:
+        parser.reset()
+        pool.append(parser)
+
+
+def _format_log(
+        parsed: List[Tuple[str, Optional[str], Optional[str], Optional[str]]],
+        attrs: Dict[str, Any],
+) -> str:
+    return ''.join(
+        literal + ('' if field is None else str(attrs[field]))
+        for literal, field, _, _ in parsed
+    )
+
 
 flags.add_argument(
     '--ca-key-file',
@@ -91,6 +162,14 @@ flags.add_argument(
     help='Default: None.  Comma separated list of headers to remove before '
     'dispatching client request to upstream server.',
 )
+flags.add_argument(
+    '--disable-upstream-tcp-nodelay',
+    action='store_true',
+    default=DEFAULT_DISABLE_UPSTREAM_TCP_NODELAY,
+    help='Default: False.  Disable TCP_NODELAY on upstream server '
+    'connections.  By default Nagle\'s algorithm is turned off so that '
+    'forwarded requests are not delayed waiting for ACKs.',
+)
 flags.add_argument(
     '--server-recvbuf-size',
     type=int,
@@ -112,8 +191,14 @@ class HttpProxyPlugin(HttpProtocolHandlerPlugin):
         ),
     )
 
-    # Used to synchronization during certificate generation.
-    lock = threading.Lock()
+    # In-memory cache of generated certificate paths plus per-host
+    # locks used to synchronize certificate generation.  Only
+    # concurrent interceptions of the same host serialize; distinct
+    # hosts generate certificates in parallel.  The guard lock is held
+    # just long enough to vivify a per-host lock.
+    _cert_cache: Dict[str, str] = {}
+    _cert_locks: Dict[str, threading.Lock] = {}
+    _cache_guard = threading.Lock()
 
     def __init__(
             self,
@@ -122,9 +207,35 @@ class HttpProxyPlugin(HttpProtocolHandlerPlugin):
         super().__init__(*args, **kwargs)
         self.start_time: float = time.time()
         self.server: Optional[TcpServerConnection] = None
-        self.response: HttpParser = HttpParser(httpParserTypes.RESPONSE_PARSER)
+        self.response: HttpParser = _acquire_parser(
+            httpParserTypes.RESPONSE_PARSER,
+        )
         self.pipeline_request: Optional[HttpParser] = None
         self.pipeline_response: Optional[HttpParser] = None
+        # Lazily decoded request host, see host_str below.
+        self._host_str: Optional[str] = None
+
+        # enable_events never changes after startup; cache it so the
+        # emit_* early returns are a single attribute read.
+        self._events_enabled: bool = self.flags.enable_events
+        # Flags never change after startup, compute once instead of
+        # re-evaluating four attribute lookups per client data packet.
+        self._tls_intercept: bool = (
+            self.flags.ca_key_file is not None and
+            self.flags.ca_cert_dir is not None and
+            self.flags.ca_signing_key_file is not None and
+            self.flags.ca_cert_file is not None
+        )
+
+        # Reused across upstream recv calls to avoid a fresh
+        # server_recvbuf_size bytes allocation per read.
+        self._recvbuf: bytearray = bytearray(self.flags.server_recvbuf_size)
+        # Descriptor lists reused across get_descriptors calls.  The
+        # handler consumes them immediately into its events dict, so
+        # clearing in-place is safe and avoids two list allocations
+        # per connection per event loop tick.
+        self._read_desc: List[socket.socket] = []
+        self._write_desc: List[socket.socket] = []
 
         self.plugins: Dict[str, HttpProxyBasePlugin] = {}
         if b'HttpProxyBasePlugin' in self.flags.plugins:
@@ -136,12 +247,31 @@ class HttpProxyPlugin(HttpProtocolHandlerPlugin):
                     self.event_queue,
                 )
                 self.plugins[instance.name()] = instance
+        # Frozen iteration order for the hot-path loops below; the
+        # plugins dict is never mutated after init and tuple iteration
+        # is cheaper than re-materializing a dict_values view per call.
+        self._plugins: Tuple[HttpProxyBasePlugin, ...] = tuple(
+            self.plugins.values(),
+        )
+        # Transparent mode: with no proxy plugins and events disabled,
+        # nothing inspects the response past its status line and
+        # headers.  Body chunks are then byte-counted instead of fed
+        # through the response parser.
+        self._transparent: bool = not self._plugins and \
+            not self._events_enabled
+
+    @property
+    def host_str(self) -> str:
+        """Decoded ``self.request.host``, cached after first access.
+
+        The same host bytes are otherwise UTF-8 decoded several times
+        while setting up an intercepted connection."""
+        if self._host_str is None:
+            self._host_str = cast(str, text_(self.request.host))
+        return self._host_str
 
     def tls_interception_enabled(self) -> bool:
-        return self.flags.ca_key_file is not None and \
-            self.flags.ca_cert_dir is not None and \
-            self.flags.ca_signing_key_file is not None and \
-            self.flags.ca_cert_file is not None
+        return self._tls_intercept
 
     def get_descriptors(
             self,
@@ -149,18 +279,24 @@ class HttpProxyPlugin(HttpProtocolHandlerPlugin):
         if not self.request.has_host():
             return [], []
 
-        r: List[socket.socket] = []
-        w: List[socket.socket] = []
-        if self.server and not self.server.closed and self.server.connection:
-            r.append(self.server.connection)
-        if self.server and not self.server.closed and \
-                self.server.has_buffer() and self.server.connection:
-            w.append(self.server.connection)
+        r: List[socket.socket] = self._read_desc
+        w: List[socket.socket] = self._write_desc
+        r.clear()
+        w.clear()
+        server = self.server
+        if server and not server.closed:
+            conn = server.connection
+            if conn:
+                r.append(conn)
+                if server.has_buffer():
+                    w.append(conn)
 
         # TODO(abhinavsingh): We need to keep a mapping of plugin and
         # descriptors registered by them, so that within write/read blocks
         # we can invoke the right plugin callbacks.
-        for plugin in self.plugins.values():
+        if not self._plugins:
+            return r, w
+        for plugin in self._plugins:
             plugin_read_desc, plugin_write_desc = plugin.get_descriptors()
             r.extend(plugin_read_desc)
             w.extend(plugin_write_desc)
@@ -168,21 +304,23 @@ class HttpProxyPlugin(HttpProtocolHandlerPlugin):
         return r, w
 
     def write_to_descriptors(self, w: Writables) -> bool:
-        if (self.server and self.server.connection not in w) or not self.server:
+        # Bind upstream connection once; this runs per event loop tick
+        # and repeated self.server attribute loads add up.
+        server = self.server
+        if not server or server.connection not in w:
             # Currently, we just call write/read block of each plugins.  It is
             # plugins responsibility to ignore this callback, if passed descriptors
             # doesn't contain the descriptor they registered.
-            for plugin in self.plugins.values():
-                teardown = plugin.write_to_descriptors(w)
-                if teardown:
-                    return True
+            if self._plugins:
+                for plugin in self._plugins:
+                    teardown = plugin.write_to_descriptors(w)
+                    if teardown:
+                        return True
         elif self.request.has_host() and \
-                self.server and not self.server.closed and \
-                self.server.has_buffer() and \
-                self.server.connection in w:
+                not server.closed and server.has_buffer():
             logger.debug('Server is write ready, flushing buffer')
             try:
-                self.server.flush()
+                server.flush()
             except ssl.SSLWantWriteError:
                 logger.warning(
                     'SSLWantWriteError while trying to flush to server, will retry',
@@ -201,26 +339,27 @@ class HttpProxyPlugin(HttpProtocolHandlerPlugin):
         return False
 
     def read_from_descriptors(self, r: Readables) -> bool:
-        if (self.server and self.server.connection not in r) or not self.server:
+        # Bind upstream connection once; this runs per event loop tick
+        # and repeated self.server attribute loads add up.
+        server = self.server
+        if not server or server.connection not in r:
             # Currently, we just call write/read block of each plugins.  It is
             # plugins responsibility to ignore this callback, if passed descriptors
             # doesn't contain the descriptor they registered for.
-            for plugin in self.plugins.values():
-                teardown = plugin.read_from_descriptors(r)
-                if teardown:
-                    return True
-        elif self.request.has_host() \
-                and self.server \
-                and not self.server.closed \
-                and self.server.connection in r:
+            if self._plugins:
+                for plugin in self._plugins:
+                    teardown = plugin.read_from_descriptors(r)
+                    if teardown:
+                        return True
+        elif self.request.has_host() and not server.closed:
             logger.debug('Server is ready for reads, reading...')
             try:
-                raw = self.server.recv(self.flags.server_recvbuf_size)
+                raw = server.recv_into(self._recvbuf)
             except TimeoutError as e:
                 if e.errno == errno.ETIMEDOUT:
                     logger.warning(
                         '%s:%d timed out on recv' %
-                        self.server.addr,
+                        server.addr,
                     )
                     return True
                 raise e
@@ -231,7 +370,7 @@ class HttpProxyPlugin(HttpProtocolHandlerPlugin):
                 if e.errno == errno.EHOSTUNREACH:
                     logger.warning(
                         '%s:%d unreachable on recv' %
-                        self.server.addr,
+                        server.addr,
                     )
                     return True
                 if e.errno == errno.ECONNRESET:
@@ -239,16 +378,21 @@ class HttpProxyPlugin(HttpProtocolHandlerPlugin):
                 else:
                     logger.exception(
                         'Exception while receiving from %s connection %r with reason %r' %
-                        (self.server.tag, self.server.connection, e),
+                        (server.tag, server.connection, e),
                     )
                 return True
 
             if raw is None:
                 logger.debug('Server closed connection, tearing down...')
                 return True
+            # Snapshot out of the shared receive buffer; the view is
+            # queued for the client below and outlives the next
+            # recv_into.
+            raw = memoryview(bytes(raw))
 
-            for plugin in self.plugins.values():
-                raw = plugin.handle_upstream_chunk(raw)
+            if self._plugins:
+                for plugin in self._plugins:
+                    raw = plugin.handle_upstream_chunk(raw)
 
             # parse incoming response packet
             # only for non-https requests and when
@@ -258,12 +402,15 @@ class HttpProxyPlugin(HttpProtocolHandlerPlugin):
                 # currently response parsing is disabled when TLS interception is enabled.
                 #
                 # or self.tls_interception_enabled():
-                if self.response.state == httpParserStates.COMPLETE:
+                if self._transparent and \
+                        self.response.state >= httpParserStates.HEADERS_COMPLETE:
+                    # Status line and headers were already captured
+                    # for the access log; only count body bytes.
+                    self.response.total_size += len(raw)
+                elif self.response.state == httpParserStates.COMPLETE:
                     self.handle_pipeline_response(raw)
                 else:
-                    # TODO(abhinavsingh): Remove .tobytes after parser is
-                    # memoryview compliant
-                    self.response.parse(raw.tobytes())
+                    self.response.parse(raw)
                     self.emit_response_events()
             else:
                 self.response.total_size += len(raw)
@@ -288,12 +435,13 @@ class HttpProxyPlugin(HttpProtocolHandlerPlugin):
             'response_reason': text_(self.response.reason),
         }
         log_handled = False
-        for plugin in self.plugins.values():
-            ctx = plugin.on_access_log(context)
-            if ctx is None:
-                log_handled = True
-                break
-            context = ctx
+        if self._plugins:
+            for plugin in self._plugins:
+                ctx = plugin.on_access_log(context)
+                if ctx is None:
+                    log_handled = True
+                    break
+                context = ctx
         if not log_handled:
             self.access_log(context)
 
@@ -308,8 +456,19 @@ class HttpProxyPlugin(HttpProtocolHandlerPlugin):
         # equivalent within proxy plugins.
         #
         # Invoke plugin.on_upstream_connection_close
-        for plugin in self.plugins.values():
-            plugin.on_upstream_connection_close()
+        if self._plugins:
+            for plugin in self._plugins:
+                plugin.on_upstream_connection_close()
+
+        # Return held parsers to their pools; nothing reads them after
+        # the access log above.
+        _release_parser(self.response)
+        if self.pipeline_request is not None:
+            _release_parser(self.pipeline_request)
+            self.pipeline_request = None
+        if self.pipeline_response is not None:
+            _release_parser(self.pipeline_response)
+            self.pipeline_response = None
 
         # If server was never initialized, return
         if self.server is None:
@@ -332,12 +491,12 @@ class HttpProxyPlugin(HttpProtocolHandlerPlugin):
             )
 
     def access_log(self, log_attrs: Dict[str, Any]) -> None:
-        access_log_format = DEFAULT_HTTPS_ACCESS_LOG_FORMAT
-        if self.request.method != httpMethods.CONNECT:
-            access_log_format = DEFAULT_HTTP_ACCESS_LOG_FORMAT
-        logger.info(access_log_format.format_map(log_attrs))
+        parsed = _HTTPS_LOG_FORMAT \
+            if self.request.method == httpMethods.CONNECT \
+            else _HTTP_LOG_FORMAT
+        logger.info(_format_log(parsed, log_attrs))
 
-    def on_response_chunk(self, chunk: List[memoryview]) -> List[memoryview]:
+    def on_response_chunk(self, chunk: Deque[memoryview]) -> Deque[memoryview]:
         # TODO: Allow to output multiple access_log lines
         # for each request over a pipelined HTTP connection (not for HTTPS).
         # However, this must also be accompanied by resetting both request
@@ -363,57 +522,61 @@ class HttpProxyPlugin(HttpProtocolHandlerPlugin):
         #
         # We only call handle_client_data once original request has been
         # completely received
-        if not self.server:
-            for plugin in self.plugins.values():
-                o = plugin.handle_client_data(raw)
-                if o is None:
-                    return None
-                raw = o
-        elif self.server and not self.server.closed:
+        server = self.server
+        if not server:
+            if self._plugins:
+                for plugin in self._plugins:
+                    o = plugin.handle_client_data(raw)
+                    if o is None:
+                        return None
+                    raw = o
+        elif not server.closed:
             # For http proxy requests, handle pipeline case.
             # We also handle pipeline scenario for https proxy
             # requests is TLS interception is enabled.
             if self.request.state == httpParserStates.COMPLETE and (
                     self.request.method != httpMethods.CONNECT or
-                    self.tls_interception_enabled()
+                    self._tls_intercept
             ):
                 if self.pipeline_request is not None and \
                         self.pipeline_request.is_connection_upgrade():
                     # Previous pipelined request was a WebSocket
                     # upgrade request. Incoming client data now
                     # must be treated as WebSocket protocol packets.
-                    self.server.queue(raw)
+                    server.queue(raw)
                     return None
 
                 if self.pipeline_request is None:
-                    self.pipeline_request = HttpParser(
+                    self.pipeline_request = _acquire_parser(
                         httpParserTypes.REQUEST_PARSER,
                     )
 
-                # TODO(abhinavsingh): Remove .tobytes after parser is
-                # memoryview compliant
-                self.pipeline_request.parse(raw.tobytes())
+                self.pipeline_request.parse(raw)
                 if self.pipeline_request.state == httpParserStates.COMPLETE:
-                    for plugin in self.plugins.values():
-                        assert self.pipeline_request is not None
-                        r = plugin.handle_client_request(self.pipeline_request)
-                        if r is None:
-                            return None
-                        self.pipeline_request = r
+                    if self._plugins:
+                        for plugin in self._plugins:
+                            assert self.pipeline_request is not None
+                            r = plugin.handle_client_request(
+                                self.pipeline_request,
+                            )
+                            if r is None:
+                                return None
+                            self.pipeline_request = r
                     assert self.pipeline_request is not None
                     # TODO(abhinavsingh): Remove memoryview wrapping here after
                     # parser is fully memoryview compliant
-                    self.server.queue(
+                    server.queue(
                         memoryview(
                             self.pipeline_request.build(),
                         ),
                     )
                     if not self.pipeline_request.is_connection_upgrade():
+                        _release_parser(self.pipeline_request)
                         self.pipeline_request = None
             # For scenarios where we cannot peek into the data,
             # simply queue for upstream server.
             else:
-                self.server.queue(raw)
+                server.queue(raw)
             return None
         return raw
 
@@ -431,25 +594,27 @@ class HttpProxyPlugin(HttpProtocolHandlerPlugin):
         #    e.g. for scenarios when plugins want to return response from cache, or,
         #    via out-of-band over the network request.
         do_connect = True
-        for plugin in self.plugins.values():
-            r = plugin.before_upstream_connection(self.request)
-            if r is None:
-                do_connect = False
-                break
-            self.request = r
+        if self._plugins:
+            for plugin in self._plugins:
+                r = plugin.before_upstream_connection(self.request)
+                if r is None:
+                    do_connect = False
+                    break
+                self.request = r
 
         # Connect to upstream
         if do_connect:
             self.connect_upstream()
 
         # Invoke plugin.handle_client_request
-        for plugin in self.plugins.values():
-            assert self.request is not None
-            r = plugin.handle_client_request(self.request)
-            if r is not None:
-                self.request = r
-            else:
-                return False
+        if self._plugins:
+            for plugin in self._plugins:
+                assert self.request is not None
+                r = plugin.handle_client_request(self.request)
+                if r is not None:
+                    self.request = r
+                else:
+                    return False
 
         # For https requests, respond back with tunnel established response.
         # Optionally, setup interceptor if TLS interception is enabled.
@@ -458,17 +623,16 @@ class HttpProxyPlugin(HttpProtocolHandlerPlugin):
                 self.client.queue(
                     HttpProxyPlugin.PROXY_TUNNEL_ESTABLISHED_RESPONSE_PKT,
                 )
-                if self.tls_interception_enabled():
+                if self._tls_intercept:
                     return self.intercept()
             # If an upstream server connection was established for http request,
             # queue the request for upstream server.
             else:
+                # Headers rewritten during serialization, single pass
+                # over the header store:
                 # - proxy-connection header is a mistake, it doesn't seem to be
                 #   officially documented in any specification, drop it.
                 # - proxy-authorization is of no use for upstream, remove it.
-                self.request.del_headers(
-                    [b'proxy-authorization', b'proxy-connection'],
-                )
                 # - For HTTP/1.0, connection header defaults to close
                 # - For HTTP/1.1, connection header defaults to keep-alive
                 # Respect headers sent by client instead of manipulating
@@ -476,14 +640,12 @@ class HttpProxyPlugin(HttpProtocolHandlerPlugin):
                 # https://developer.mozilla.org/en-US/docs/Web/HTTP/Headers/Connection
                 # connection headers are meant for communication between client and
                 # first intercepting proxy.
-                self.request.add_headers(
-                    [(b'Via', b'1.1 %s' % PROXY_AGENT_HEADER_VALUE)],
-                )
-                # Disable args.disable_headers before dispatching to upstream
                 self.server.queue(
                     memoryview(
                         self.request.build(
                             disable_headers=self.flags.disable_headers,
+                            add_headers=_VIA_HEADER,
+                            del_headers=_DROP_HEADERS,
                         ),
                     ),
                 )
@@ -491,37 +653,56 @@ class HttpProxyPlugin(HttpProtocolHandlerPlugin):
 
     def handle_pipeline_response(self, raw: memoryview) -> None:
         if self.pipeline_response is None:
-            self.pipeline_response = HttpParser(
+            self.pipeline_response = _acquire_parser(
                 httpParserTypes.RESPONSE_PARSER,
             )
-        # TODO(abhinavsingh): Remove .tobytes after parser is memoryview
-        # compliant
-        self.pipeline_response.parse(raw.tobytes())
+        self.pipeline_response.parse(raw)
         if self.pipeline_response.state == httpParserStates.COMPLETE:
+            _release_parser(self.pipeline_response)
             self.pipeline_response = None
 
     def connect_upstream(self) -> None:
         host, port = self.request.host, self.request.port
         if host and port:
-            self.server = TcpServerConnection(text_(host), port)
+            host_str = self.host_str
+            self.server = TcpServerConnection(host_str, port)
             try:
                 logger.debug(
                     'Connecting to upstream %s:%s' %
-                    (text_(host), port),
+                    (host_str, port),
                 )
                 self.server.connect()
                 self.server.connection.setblocking(False)
+                self._tune_upstream_socket(self.server.connection)
                 logger.debug(
                     'Connected to upstream %s:%s' %
-                    (text_(host), port),
+                    (host_str, port),
                 )
             except Exception as e:  # TimeoutError, socket.gaierror
                 self.server.closed = True
-                raise ProxyConnectionFailed(text_(host), port, repr(e)) from e
+                raise ProxyConnectionFailed(host_str, port, repr(e)) from e
         else:
             logger.exception('Both host and port must exist')
             raise HttpProtocolException()
 
+    def _tune_upstream_socket(self, conn: socket.socket) -> None:
+        """Tune upstream socket options for proxying throughput.
+
+        TCP_NODELAY avoids Nagle-delayed request forwarding and can be
+        turned off via --disable-upstream-tcp-nodelay.  SO_RCVBUF is
+        deliberately not touched: set after connect it no longer
+        affects the negotiated window (tcp(7)), and an explicit value
+        disables kernel receive-buffer autotuning, which serves
+        high-BDP connections better than a fixed cap."""
+        if self.flags.disable_upstream_tcp_nodelay:
+            return
+        try:
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except OSError as e:    # pragma: no cover
+            # Tuning is best effort, e.g. unix domain sockets used
+            # within tests don't accept TCP options.
+            logger.debug('Unable to tune upstream socket %r', e)
+
     #
     # Interceptor related methods
     #
@@ -541,31 +722,22 @@ class HttpProxyPlugin(HttpProtocolHandlerPlugin):
             self.flags.ca_key_file and self.flags.ca_cert_file
         )
 
+        host = self.host_str
         upstream_subject = {s[0][0]: s[0][1] for s in certificate['subject']}
         public_key_path = os.path.join(
             self.flags.ca_cert_dir,
-            '{0}.{1}'.format(text_(self.request.host), 'pub'),
+            '{0}.{1}'.format(host, 'pub'),
         )
         private_key_path = self.flags.ca_signing_key_file
         private_key_password = ''
 
         # Build certificate subject
-        keys = {
-            'CN': 'commonName',
-            'C': 'countryName',
-            'ST': 'stateOrProvinceName',
-            'L': 'localityName',
-            'O': 'organizationName',
-            'OU': 'organizationalUnitName',
-        }
-        subject = ''
-        for key in keys:
-            if upstream_subject.get(keys[key], None):
-                subject += '/{0}={1}'.format(
-                    key,
-                    upstream_subject.get(keys[key]),
-                )
-        alt_subj_names = [text_(self.request.host)]
+        subject = ''.join(
+            '/{0}={1}'.format(key, upstream_subject[name])
+            for key, name in _SUBJECT_KEYS
+            if upstream_subject.get(name)
+        )
+        alt_subj_names = [host]
         validity_in_days = 365 * 2
         timeout = 10
 
@@ -581,7 +753,7 @@ class HttpProxyPlugin(HttpProtocolHandlerPlugin):
 
         csr_path = os.path.join(
             self.flags.ca_cert_dir,
-            '{0}.{1}'.format(text_(self.request.host), 'csr'),
+            '{0}.{1}'.format(host, 'csr'),
         )
 
         # Generate a CSR request for this common name
@@ -626,15 +798,58 @@ class HttpProxyPlugin(HttpProtocolHandlerPlugin):
                 f'--ca-key-file:{ self.flags.ca_key_file }, '
                 f'--ca-signing-key-file:{ self.flags.ca_signing_key_file }',
             )
+        host = self.host_str
+        cached = HttpProxyPlugin._cert_cache.get(host)
+        if cached is not None:
+            return cached
         cert_file_path = HttpProxyPlugin.generated_cert_file_path(
-            self.flags.ca_cert_dir, text_(self.request.host),
+            self.flags.ca_cert_dir, host,
+        )
+        with HttpProxyPlugin._cache_guard:
+            lock = HttpProxyPlugin._cert_locks.setdefault(
+                host, threading.Lock(),
+            )
+        with lock:
+            if host not in HttpProxyPlugin._cert_cache:
+                if not os.path.isfile(cert_file_path):
+                    self._gen_ca_signed_certificate_locked(
+                        cert_file_path, certificate,
+                    )
+                HttpProxyPlugin._cert_cache[host] = cert_file_path
+        return cert_file_path
+
+    def _gen_ca_signed_certificate_locked(
+            self, cert_file_path: str, certificate: Dict[str, Any],
+    ) -> None:
+        """Generate the certificate under an exclusive file lock.
+
+        Workers run as separate processes, so the in-process per-host
+        locks cannot stop two workers from generating the same
+        certificate concurrently.  An flock on a sidecar file can."""
+        if fcntl is None:
+            self.gen_ca_signed_certificate(cert_file_path, certificate)
+            return
+        lock_fd = os.open(
+            cert_file_path + '.lock', os.O_CREAT | os.O_RDWR,
         )
-        with self.lock:
+        try:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX)
+            # Another worker may have generated the certificate while
+            # this one waited on the lock.
             if not os.path.isfile(cert_file_path):
                 self.gen_ca_signed_certificate(cert_file_path, certificate)
-        return cert_file_path
+        finally:
+            os.close(lock_fd)
 
     def intercept(self) -> Union[socket.socket, bool]:
+        # NOTE: Interception is synchronous by contract: the handler
+        # expects the wrapped client socket as the return value of
+        # on_request_complete.  Under --threadless this means a cold
+        # certificate generation briefly blocks the shared event loop;
+        # the per-host certificate cache limits that to the first
+        # interception of each host.  Making this non-blocking needs
+        # Work.handle_events to grow a suspend/resume protocol first.
+        #
         # Perform SSL/TLS handshake with upstream
         self.wrap_server()
         # Generate certificate and perform handshake with client
@@ -659,14 +874,14 @@ class HttpProxyPlugin(HttpProtocolHandlerPlugin):
             return True
         # Update all plugin connection reference
         # TODO(abhinavsingh): Is this required?
-        for plugin in self.plugins.values():
+        for plugin in self._plugins:
             plugin.client._conn = self.client.connection
         return self.client.connection
 
     def wrap_server(self) -> None:
         assert self.server is not None
         assert isinstance(self.server.connection, socket.socket)
-        self.server.wrap(text_(self.request.host), self.flags.ca_file)
+        self.server.wrap(self.host_str, self.flags.ca_file)
         assert isinstance(self.server.connection, ssl.SSLSocket)
 
     def wrap_client(self) -> None:
@@ -685,9 +900,10 @@ class HttpProxyPlugin(HttpProtocolHandlerPlugin):
     #
 
     def emit_request_complete(self) -> None:
-        if not self.flags.enable_events:
+        if not self._events_enabled:
             return
 
+        assert self.request.host
         assert self.request.path
         assert self.request.port
         self.event_queue.publish(
@@ -696,7 +912,12 @@ class HttpProxyPlugin(HttpProtocolHandlerPlugin):
             event_payload={
                 'url': text_(self.request.path)
                 if self.request.method == httpMethods.CONNECT
-                else 'http://%s:%d%s' % (text_(self.request.host), self.request.port, text_(self.request.path)),
+                else text_(
+                    b''.join([
+                        b'http://', self.request.host, b':',
+                        b'%d' % self.request.port, self.request.path,
+                    ]),
+                ),
                 'method': text_(self.request.method),
                 'headers': {text_(k): text_(v[1]) for k, v in self.request.headers.items()},
                 'body': text_(self.request.body)
@@ -707,7 +928,7 @@ class HttpProxyPlugin(HttpProtocolHandlerPlugin):
         )
 
     def emit_response_events(self) -> None:
-        if not self.flags.enable_events:
+        if not self._events_enabled:
             return
 
         if self.response.state == httpParserStates.COMPLETE:
@@ -718,13 +939,13 @@ class HttpProxyPlugin(HttpProtocolHandlerPlugin):
             self.emit_response_headers_complete()
 
     def emit_response_headers_complete(self) -> None:
-        if not self.flags.enable_events:
+        if not self._events_enabled:
             return
 
     def emit_response_chunk_received(self) -> None:
-        if not self.flags.enable_events:
+        if not self._events_enabled:
             return
 
     def emit_response_complete(self) -> None:
-        if not self.flags.enable_events:
+        if not self._events_enabled:
             return
@@ -15,7 +15,7 @@ import logging
 import os
 import mimetypes
 import socket
-from typing import List, Tuple, Optional, Dict, Union, Any, Pattern
+from typing import List, Tuple, Deque, Optional, Dict, Union, Any, Pattern
 
 from .plugin import HttpWebServerBasePlugin
 from .protocols import httpProtocolTypes
@@ -254,7 +254,7 @@ class HttpWebServerPlugin(HttpProtocolHandlerPlugin):
                 self.pipeline_request = None
         return raw
 
-    def on_response_chunk(self, chunk: List[memoryview]) -> List[memoryview]:
+    def on_response_chunk(self, chunk: Deque[memoryview]) -> Deque[memoryview]:
         return chunk
 
     def on_client_connection_close(self) -> None:
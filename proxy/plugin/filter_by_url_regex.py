@@ -10,20 +10,493 @@
 """
 import json
 import logging
+import threading
 
-from typing import Optional, List, Dict, Any
+from collections import OrderedDict
+
+from typing import Optional, List, Dict, Any, Tuple, Pattern, Iterator, cast
 
 from ..common.flag import flags
 from ..http.exception import HttpRequestRejected
 from ..http.parser import HttpParser
 from ..http.codes import httpStatusCodes
 from ..http.proxy import HttpProxyBasePlugin
-from ..common.utils import text_
+from ..common.utils import bytes_
 
 import re
 
+try:
+    # Optional linear-time multi-regex engine.  Hyperscan scans all
+    # rules in a single pass over the URL and is immune to
+    # catastrophic backtracking, but is not an install requirement.
+    import hyperscan    # type: ignore[import]
+except ImportError:     # pragma: no cover
+    hyperscan = None
+
 logger = logging.getLogger(__name__)
 
+# Python regexes historically cap out at 100 groups (a hard compile
+# error on older supported versions).  Stay well below when packing
+# rules into combined alternation patterns.
+_GROUP_BUDGET = 90
+
+# Recently decided URLs; page refetches and polling endpoints repeat
+# the same URL, and a repeat should cost one dict probe rather than a
+# run through the filter gauntlet.  Plugin instances are created per
+# connection, so the cache lives at module level and is keyed by the
+# config path to keep differently configured proxies apart.  Values
+# are the matched rule number, or None for allowed URLs.
+_DECISION_CACHE_SIZE = 4096
+
+# Rejection response headers are constant for this plugin; built once
+# instead of a dict literal per blocked request.  Safe to share since
+# build_http_response only mutates headers for bodied responses.  The
+# exception itself is still constructed per raise: reusing one
+# instance would accumulate __traceback__/__context__ chains.
+_REJECT_HEADERS = {b'Connection': b'close'}
+
+# A sequence of combined patterns, each paired with the required
+# literals of its rules (None disables the literal prefilter).  Stored
+# as flat tuples: the hot loop streams through one contiguous object
+# array per bucket and the literal scan through another, instead of
+# chasing list headers rebuilt at init.
+_CombinedRules = Tuple[Tuple[Pattern[bytes], Optional[Tuple[bytes, ...]]], ...]
+_decision_cache: 'OrderedDict[Tuple[str, bytes, Optional[bytes]], Optional[int]]' = OrderedDict()
+# Connections run on separate threads (see Acceptor.start_work), so
+# the get/move_to_end and set/evict sequences must be atomic: without
+# the lock another thread's eviction can remove a key between get and
+# move_to_end, raising KeyError on the hot path.
+_decision_cache_lock = threading.Lock()
+_MISS = object()
+
+# Multi-pattern buckets are re-sorted by hit count once per this many
+# matched rules, keeping the empirically hottest patterns first.
+_REORDER_INTERVAL = 1024
+
+# Rules carrying numbered backreferences or named groups cannot be
+# embedded into a combined alternation: group numbers shift inside the
+# joined pattern and named groups may collide across rules, both hard
+# re.error compile failures.  Such rules are matched standalone.
+_UNPACKABLE = re.compile(rb'\\[0-9]|\(\?P')
+
+# Substring checks below this length match too often to be useful.
+_MIN_LITERAL_LENGTH = 4
+
+
+def _literal_runs(pat_bytes: bytes) -> List[bytes]:
+    """Walks a pattern and returns its runs of required literal bytes.
+
+    Escapes are consumed as a unit: escaped punctuation contributes
+    the literal character itself, while \\d-style classes break the
+    run (splitting at the bare backslash would leak the class letter
+    into the literal).  Character classes and {m,n} repetitions are
+    skipped whole, and ?/*/{ quantifiers drop the character they apply
+    to, since it is no longer guaranteed to appear exactly once."""
+    runs: List[bytes] = []
+    current = bytearray()
+    i, n = 0, len(pat_bytes)
+    while i < n:
+        c = pat_bytes[i:i + 1]
+        if c == b'\\':
+            escaped = pat_bytes[i + 1:i + 2]
+            if escaped == b'' or escaped.isalnum():
+                runs.append(bytes(current))
+                current = bytearray()
+            else:
+                current += escaped
+            i += 2
+        elif c in (b'?', b'*'):
+            del current[-1:]
+            runs.append(bytes(current))
+            current = bytearray()
+            i += 1
+        elif c == b'{':
+            del current[-1:]
+            runs.append(bytes(current))
+            current = bytearray()
+            end = pat_bytes.find(b'}', i)
+            i = n if end == -1 else end + 1
+        elif c == b'[':
+            runs.append(bytes(current))
+            current = bytearray()
+            end = pat_bytes.find(b']', i + 1)
+            i = n if end == -1 else end + 1
+        elif c in (b'+', b'.', b'^', b'$', b']'):
+            # + keeps its character required but may repeat it, so the
+            # run still ends here; the rest match arbitrary bytes or
+            # are zero-width.
+            runs.append(bytes(current))
+            current = bytearray()
+            i += 1
+        else:
+            current += c
+            i += 1
+    runs.append(bytes(current))
+    return runs
+
+
+def _required_literal(entry: Dict[str, Any], pat_bytes: bytes) -> Optional[bytes]:
+    """Literal bytes that must appear in any URL matching the rule.
+
+    Rules may declare one explicitly via a "literal" key.  Otherwise,
+    for patterns free of alternation and groups, every literal run
+    (see _literal_runs) is required and the longest is picked.
+    Patterns with | or ( could have their longest run inside an
+    optional branch, so no literal is auto-derived for them.  Returns
+    None when no usable literal exists; such rules are always matched
+    via regex."""
+    literal = entry.get('literal')
+    if literal is not None:
+        # bytes_ returns Any by declaration; pin it down for strict
+        # mypy.
+        return cast(bytes, bytes_(literal))
+    if b'|' in pat_bytes or b'(' in pat_bytes:
+        return None
+    longest = max(_literal_runs(pat_bytes), key=len)
+    return longest if len(longest) >= _MIN_LITERAL_LENGTH else None
+
+
+def _strip_redundant_affixes(pat_bytes: bytes) -> bytes:
+    """Strips leading and trailing ``.*`` runs redundant under search.
+
+    Matching only ever asks whether a pattern matches somewhere within
+    the URL, so an unanchored ``.*`` prefix forces the engine to
+    backtrack through every start position twice, and a ``.*`` suffix
+    merely consumes the rest of the input after a hit.  Affixes stay
+    when stripping could change meaning (an escape, quantifier, group
+    or alternation boundary at the cut point)."""
+    while pat_bytes.startswith(b'.*') and \
+            pat_bytes[2:3] not in (b'?', b'*', b'+', b'{'):
+        pat_bytes = pat_bytes[2:]
+    while pat_bytes.endswith(b'.*') and \
+            not pat_bytes[:-2].endswith((b'\\', b'(', b'|')):
+        pat_bytes = pat_bytes[:-2]
+    # A pure wildcard rule reduces to nothing; keep it explicit.
+    return pat_bytes or b'.*'
+
+
+_PLAIN_LABEL = re.compile(rb'^[a-zA-Z0-9\-]+$')
+
+
+def _host_suffix(pat_bytes: bytes) -> Optional[bytes]:
+    """Host suffix under which a rule can be indexed, or None.
+
+    The host anchor is the pattern portion before the first slash;
+    rules without a slash could match entirely within the path of an
+    unrelated host and are not indexed.  Dots within the anchor are
+    taken as literal dots, which is how these filter configs are
+    written even when left unescaped.
+
+    The key is the run of trailing plain labels, but matching is plain
+    re.search, which can land mid-label: tpc\\.googlesyndication\\.com
+    also matches host xtpc.googlesyndication.com, whose label-boundary
+    suffixes never equal tpc.googlesyndication.com.  Only labels known
+    to sit behind a literal dot in the pattern are trustworthy, so
+    when the run reaches the very start of the anchor its leftmost
+    label is dropped from the key.  Rules with top-level alternation
+    in the anchor, or no trustworthy label at all, stay in the global
+    bucket."""
+    if b'/' not in pat_bytes:
+        return None
+    host_part = pat_bytes.split(b'/', 1)[0]
+    if b'|' in host_part:
+        return None
+    suffix: List[bytes] = []
+    anchored = False
+    for label in reversed(host_part.replace(b'\\.', b'.').split(b'.')):
+        if not _PLAIN_LABEL.match(label):
+            # Run stopped at a non-plain label; the collected labels
+            # all sit behind a literal dot.
+            anchored = True
+            break
+        suffix.insert(0, label)
+    if not anchored:
+        suffix = suffix[1:]
+    if not suffix:
+        return None
+    return b'.'.join(suffix)
+
+
+class _FilterIndex:
+    """Compiled matching structures for one filter config file.
+
+    Shared across plugin instances via _get_index, because a plugin
+    instance only lives for a single client connection; sharing
+    compiles the rules once per process instead of once per connection
+    and lets hit counters accumulate across connections."""
+
+    def __init__(self, config_path: str) -> None:
+        # Raw filter entries live only for the duration of __init__;
+        # everything the hot path needs is held by the compiled
+        # structures below, so large blocklists aren't kept in memory
+        # twice (JSON dicts plus their compiled twins).
+        filters: List[Dict[str, Any]] = []
+        if config_path != '':
+            with open(config_path, 'rb') as f:
+                filters = json.load(f)
+        # Rules compiled once at startup.  Compiling (or relying upon
+        # re module's internal cache) per request re-parses the same
+        # patterns for every URL; with larger ad-block lists the 512
+        # entry re cache starts thrashing.  Patterns are compiled as
+        # bytes so searches run directly over the URL without decode.
+        #
+        # Blocklists commonly carry duplicate patterns, e.g. the same
+        # regex under different comments.  A duplicate alternative can
+        # never win over its earlier twin, so duplicates are dropped
+        # here: one compiled pattern per unique regex, reported under
+        # the first rule number carrying it.
+        compiled: List[Tuple[Pattern[bytes], int, Dict[str, Any]]] = []
+        seen: Dict[bytes, Pattern[bytes]] = {}
+        for rule_number, entry in enumerate(filters, start=1):
+            pat_bytes = _strip_redundant_affixes(
+                bytes_(entry['regex']),
+            )
+            entry['regex'] = pat_bytes
+            if pat_bytes in seen:
+                continue
+            seen[pat_bytes] = pattern = re.compile(pat_bytes)
+            compiled.append((pattern, rule_number, entry))
+        # Rules additionally folded into alternation patterns, so a URL
+        # is matched by a single engine pass per pattern instead of one
+        # search call per rule.  Each rule sits in a named group whose
+        # name maps back to the matched rule.  Rules are packed into as
+        # few patterns as the group budget allows, also counting groups
+        # the rules use internally.
+        #
+        # Alongside each combined pattern sit the required literals of
+        # its rules, used as a cheap substring prefilter: when every
+        # rule in the pattern has a known required literal and none
+        # occur in the URL, the regex engine is skipped entirely.
+        #
+        # Rules anchored to a specific host suffix are further bucketed
+        # by that suffix, so a request only ever runs the rules indexed
+        # under its own host (plus the global bucket), instead of the
+        # whole list.
+        self._rule_by_group: Dict[str, int] = {}
+        self._rule_by_pattern: Dict[Pattern[bytes], int] = {}
+        by_host: Dict[bytes, List[Tuple[Pattern[bytes], int, Dict[str, Any]]]] = {}
+        global_rules: List[Tuple[Pattern[bytes], int, Dict[str, Any]]] = []
+        for compiled_rule in compiled:
+            key = _host_suffix(bytes_(compiled_rule[2]['regex']))
+            if key is None:
+                global_rules.append(compiled_rule)
+            else:
+                by_host.setdefault(key, []).append(compiled_rule)
+        self._global = self._pack_combined(global_rules)
+        self._by_host_suffix: Dict[bytes, _CombinedRules] = {
+            key: self._pack_combined(rules)
+            for key, rules in by_host.items()
+        }
+        # Per combined pattern hit counters; buckets holding several
+        # patterns are periodically re-sorted so the hottest patterns
+        # are tried first.
+        self._hits: Dict[Pattern[bytes], int] = {}
+        self._matches = 0
+        # Hyperscan database, when the module is importable and all
+        # rules compile under its supported syntax.  Falls back to the
+        # combined re patterns above otherwise.
+        self._hs_db: Optional[Any] = None
+        # python-hyperscan surfaces a handler-terminated scan as an
+        # exception raised out of Database.scan; captured here so the
+        # match path knows what to swallow.
+        self._hs_scan_terminated: Tuple[Any, ...] = ()
+        if hyperscan is not None and compiled:
+            try:
+                db = hyperscan.Database()
+                db.compile(
+                    expressions=[
+                        bytes_(entry['regex'])
+                        for _pattern, _rule_number, entry in compiled
+                    ],
+                    ids=[
+                        rule_number
+                        for _pattern, rule_number, _entry in compiled
+                    ],
+                    flags=[hyperscan.HS_FLAG_SINGLEMATCH] *
+                    len(compiled),
+                )
+                self._hs_db = db
+                self._hs_scan_terminated = tuple(
+                    exc for exc in (
+                        getattr(hyperscan, 'ScanTerminated', None),
+                        getattr(hyperscan, 'error', None),
+                    )
+                    if exc is not None
+                )
+            except Exception as e:
+                logger.warning(
+                    'Unable to compile filters with hyperscan, '
+                    'falling back to re %r', e,
+                )
+
+    def _standalone(
+            self,
+            pattern: Pattern[bytes],
+            rule_number: int,
+            entry: Dict[str, Any],
+    ) -> Tuple[Pattern[bytes], Optional[Tuple[bytes, ...]]]:
+        """A rule matched on its own, outside any combined pattern."""
+        self._rule_by_pattern[pattern] = rule_number
+        literal = _required_literal(entry, bytes_(entry['regex']))
+        return pattern, (literal,) if literal is not None else None
+
+    def _pack_combined(
+            self,
+            rules: List[Tuple[Pattern[bytes], int, Dict[str, Any]]],
+    ) -> _CombinedRules:
+        """Packs rules into combined patterns with literal prefilters.
+
+        Registers every packed rule's named group into _rule_by_group.
+        Rules that cannot be embedded into an alternation (see
+        _UNPACKABLE), or chunks that fail to compile once joined, fall
+        back to standalone entries via _rule_by_pattern."""
+        combined: List[Tuple[Pattern[bytes], Optional[Tuple[bytes, ...]]]] = []
+        chunk: List[Tuple[Pattern[bytes], int, Dict[str, Any]]] = []
+        budget = 0
+
+        def seal() -> None:
+            parts: List[bytes] = []
+            literals: Optional[List[bytes]] = []
+            for _pattern, rule_number, entry in chunk:
+                group = 'r%d' % rule_number
+                pat_bytes = bytes_(entry['regex'])
+                parts.append(
+                    b'(?P<%s>%s)' % (bytes_(group), pat_bytes),
+                )
+                self._rule_by_group[group] = rule_number
+                if literals is not None:
+                    literal = _required_literal(entry, pat_bytes)
+                    if literal is None:
+                        # One literal-less rule disables the prefilter
+                        # for this combined pattern.
+                        literals = None
+                    else:
+                        literals.append(literal)
+            try:
+                combined.append((
+                    re.compile(b'|'.join(parts)),
+                    tuple(literals) if literals is not None else None,
+                ))
+            except re.error:
+                # Joining can still trip over constructs _UNPACKABLE
+                # does not recognize; the rules keep working
+                # standalone, only the batching is lost.
+                for pattern, rule_number, entry in chunk:
+                    combined.append(
+                        self._standalone(pattern, rule_number, entry),
+                    )
+
+        for pattern, rule_number, entry in rules:
+            if _UNPACKABLE.search(bytes_(entry['regex'])):
+                combined.append(
+                    self._standalone(pattern, rule_number, entry),
+                )
+                continue
+            cost = pattern.groups + 1
+            if chunk and budget + cost > _GROUP_BUDGET:
+                seal()
+                chunk, budget = [], 0
+            chunk.append((pattern, rule_number, entry))
+            budget += cost
+        if chunk:
+            seal()
+        return tuple(combined)
+
+    def _candidate_buckets(self, host: bytes) -> Iterator[_CombinedRules]:
+        """Yields rule buckets applicable to the given request host."""
+        suffix = host
+        while True:
+            bucket = self._by_host_suffix.get(suffix)
+            if bucket is not None:
+                yield bucket
+            sep = suffix.find(b'.')
+            if sep == -1:
+                break
+            suffix = suffix[sep + 1:]
+        if self._global:
+            yield self._global
+
+    def match(self, request_host: bytes, url: bytes) -> Optional[int]:
+        """Returns the first rule number matching url, else None."""
+        if self._hs_db is not None:
+            matched: List[int] = []
+
+            def on_match(
+                    rule_number: int, _from: int, _to: int,
+                    _hs_flags: int, _context: Optional[Any],
+            ) -> int:
+                matched.append(rule_number)
+                # Non-zero return terminates the scan.
+                return 1
+
+            try:
+                self._hs_db.scan(url, match_event_handler=on_match)
+            except self._hs_scan_terminated:
+                # Halting the scan from the handler raises; the match
+                # has already been recorded at that point.
+                pass
+            return matched[0] if matched else None
+        for bucket in self._candidate_buckets(request_host):
+            for pattern, literals in bucket:
+                # substring containment is far cheaper than an engine
+                # run; skip patterns whose rules cannot possibly match
+                if literals is not None and \
+                        not any(literal in url for literal in literals):
+                    continue
+                # if any rule within this combined pattern matches
+                m = pattern.search(url)
+                if m is not None:
+                    self._record_hit(pattern)
+                    # Standalone patterns map directly to their rule;
+                    # lastgroup cannot be trusted for them as the rule
+                    # itself may contain named groups.
+                    rule_number = self._rule_by_pattern.get(pattern)
+                    if rule_number is None:
+                        assert m.lastgroup is not None
+                        rule_number = self._rule_by_group[m.lastgroup]
+                    return rule_number
+        return None
+
+    def _record_hit(self, pattern: Pattern[bytes]) -> None:
+        # Deliberately unlocked despite concurrent connection threads:
+        # a lost increment only skews the ordering heuristic, and
+        # _reorder publishes whole bucket tuples, which readers pick
+        # up atomically either before or after the swap.
+        self._hits[pattern] = self._hits.get(pattern, 0) + 1
+        self._matches += 1
+        if self._matches % _REORDER_INTERVAL == 0:
+            self._reorder()
+
+    def _reorder(self) -> None:
+        """Re-sorts multi-pattern buckets by accumulated hit count.
+
+        Blocked traffic concentrates on few rules; trying the hottest
+        combined patterns first shortens the average loop.  sorted is
+        stable, so equally (un)hit patterns keep their config order."""
+        hits = self._hits
+
+        def hotness(
+                entry: Tuple[Pattern[bytes], Optional[Tuple[bytes, ...]]],
+        ) -> int:
+            return -hits.get(entry[0], 0)
+
+        if len(self._global) > 1:
+            self._global = tuple(sorted(self._global, key=hotness))
+        for key, bucket in self._by_host_suffix.items():
+            if len(bucket) > 1:
+                self._by_host_suffix[key] = tuple(sorted(bucket, key=hotness))
+
+
+_index_cache: Dict[str, _FilterIndex] = {}
+
+
+def _get_index(config_path: str) -> _FilterIndex:
+    index = _index_cache.get(config_path)
+    if index is None:
+        index = _index_cache[config_path] = _FilterIndex(config_path)
+    return index
+
+
 # See adblock.json file in repository for sample example config
 flags.add_argument(
     '--filtered-url-regex-config',
@@ -42,10 +515,7 @@ class FilterByURLRegexPlugin(HttpProxyBasePlugin):
 
     def __init__(self, *args: Any, **kwargs: Any) -> None:
         super().__init__(*args, **kwargs)
-        self.filters: List[Dict[str, Any]] = []
-        if self.flags.filtered_url_regex_config != '':
-            with open(self.flags.filtered_url_regex_config, 'rb') as f:
-                self.filters = json.load(f)
+        self._index = _get_index(self.flags.filtered_url_regex_config)
 
     def before_upstream_connection(
             self, request: HttpParser,
@@ -55,42 +525,70 @@ class FilterByURLRegexPlugin(HttpProxyBasePlugin):
     def handle_client_request(
             self, request: HttpParser,
     ) -> Optional[HttpParser]:
-        # determine host
-        request_host = None
-        if request.host:
-            request_host = request.host
-        elif b'host' in request.headers:
-            request_host = request.header(b'host')
+        # determine host, single probe into the headers dict when
+        # falling back to the Host header
+        request_host = request.host
+        if not request_host:
+            host_header = request.headers.get(b'host')
+            if host_header is not None:
+                request_host = host_header[1]
 
         if not request_host:
             logger.error("Cannot determine host")
             return request
 
-        # build URL
-        url = b'%s%s' % (
-            request_host,
-            request.path,
+        # Cache key holds host and path as-is; concatenating them into
+        # a URL allocates a fresh bytes object, deferred below until a
+        # cache miss actually needs to run the matchers.
+        key = (
+            self.flags.filtered_url_regex_config,
+            request_host, request.path,
         )
-        for rule_number, blocked_entry in enumerate(self.filters, start=1):
-            # if regex matches on URL
-            if re.search(text_(blocked_entry['regex']), text_(url)):
-                # log that the request has been filtered
-                logger.info(
-                    "Blocked: %r with status_code '%r' by rule number '%r'" % (
-                        text_(url),
-                        httpStatusCodes.NOT_FOUND,
-                        rule_number,
-                    ),
-                )
-                # close the connection with the status code from the filter
-                # list
-                raise HttpRequestRejected(
-                    status_code=httpStatusCodes.NOT_FOUND,
-                    headers={b'Connection': b'close'},
-                    reason=b'Blocked',
-                )
+        rule_number: Optional[int]
+        with _decision_cache_lock:
+            cached = _decision_cache.get(key, _MISS)
+            if cached is not _MISS:
+                _decision_cache.move_to_end(key)
+        if cached is _MISS:
+            # build URL, plain concat over %-formatting which
+            # re-parses its format string per call
+            url = request_host + (request.path or b'')
+            # Matching runs outside the lock; two threads missing on
+            # the same key at once both compute and one insert wins,
+            # which is harmless.
+            rule_number = self._index.match(request_host, url)
+            with _decision_cache_lock:
+                _decision_cache[key] = rule_number
+                if len(_decision_cache) > _DECISION_CACHE_SIZE:
+                    _decision_cache.popitem(last=False)
+        else:
+            # Past the sentinel check, cached values are the stored
+            # Optional rule numbers.
+            rule_number = cast(Optional[int], cached)
+        if rule_number is not None:
+            self._block_request(
+                request_host + (request.path or b''),
+                rule_number,
+            )
         return request
 
+    def _block_request(self, url: bytes, rule_number: int) -> None:
+        # log that the request has been filtered; formatting deferred
+        # to the logging handler, %r on bytes needs no decode
+        logger.info(
+            "Blocked: %r with status_code '%r' by rule number '%r'",
+            url,
+            httpStatusCodes.NOT_FOUND,
+            rule_number,
+        )
+        # close the connection with the status code from the filter
+        # list
+        raise HttpRequestRejected(
+            status_code=httpStatusCodes.NOT_FOUND,
+            headers=_REJECT_HEADERS,
+            reason=b'Blocked',
+        )
+
     def handle_upstream_chunk(self, chunk: memoryview) -> memoryview:
         return chunk
 
@@ -308,7 +308,11 @@ class Proxy:
                 ],
             ),
         )
-        args.disable_headers = disabled_headers if disabled_headers is not None else DEFAULT_DISABLE_HEADERS
+        # frozenset for O(1) membership test within HttpParser.build
+        args.disable_headers = frozenset(
+            disabled_headers if disabled_headers is not None
+            else DEFAULT_DISABLE_HEADERS,
+        )
         args.certfile = cast(
             Optional[str], opts.get(
                 'cert_file', args.cert_file,
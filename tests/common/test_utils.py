@@ -15,6 +15,73 @@ from unittest import mock
 from proxy.common.constants import DEFAULT_IPV6_HOSTNAME, DEFAULT_IPV4_HOSTNAME, DEFAULT_PORT, DEFAULT_TIMEOUT
 from proxy.common.constants import DEFAULT_HTTP_PORT
 from proxy.common.utils import new_socket_connection, socket_connection
+from proxy.common.utils import HeaderList, build_http_response
+
+
+class TestHeaderList(unittest.TestCase):
+
+    def test_tracks_content_length_and_transfer_encoding(self) -> None:
+        headers = HeaderList()
+        self.assertFalse(headers.has_content_length)
+        self.assertFalse(headers.has_transfer_encoding)
+        headers[b'Content-Length'] = b'5'
+        headers.append(b'Transfer-Encoding', b'chunked')
+        self.assertTrue(headers.has_content_length)
+        self.assertTrue(headers.has_transfer_encoding)
+
+    def test_tracking_is_case_insensitive(self) -> None:
+        headers = HeaderList()
+        headers[b'content-length'] = b'5'
+        self.assertTrue(headers.has_content_length)
+
+    def test_preserves_insertion_order(self) -> None:
+        headers = HeaderList()
+        headers[b'B'] = b'2'
+        headers[b'A'] = b'1'
+        self.assertEqual(headers.items(), [(b'B', b'2'), (b'A', b'1')])
+        self.assertEqual(len(headers), 2)
+
+    def test_build_http_response_equivalent_to_dict(self) -> None:
+        headers = HeaderList()
+        headers[b'Connection'] = b'close'
+        self.assertEqual(
+            build_http_response(
+                200, reason=b'OK', headers=headers, body=b'hello',
+            ),
+            build_http_response(
+                200, reason=b'OK',
+                headers={b'Connection': b'close'}, body=b'hello',
+            ),
+        )
+
+    def test_build_http_response_adds_content_length(self) -> None:
+        self.assertEqual(
+            build_http_response(
+                200, reason=b'OK', headers=HeaderList(), body=b'hello',
+            ),
+            b'HTTP/1.1 200 OK\r\nContent-Length: 5\r\n\r\nhello',
+        )
+
+    def test_build_http_response_keeps_existing_content_length(self) -> None:
+        headers = HeaderList()
+        headers[b'Content-Length'] = b'5'
+        self.assertEqual(
+            build_http_response(
+                200, reason=b'OK', headers=headers, body=b'hello',
+            ),
+            b'HTTP/1.1 200 OK\r\nContent-Length: 5\r\n\r\nhello',
+        )
+
+    def test_build_http_response_respects_transfer_encoding(self) -> None:
+        headers = HeaderList()
+        headers[b'Transfer-Encoding'] = b'chunked'
+        self.assertNotIn(
+            b'Content-Length',
+            build_http_response(
+                200, reason=b'OK', headers=headers,
+                body=b'5\r\nhello\r\n0\r\n\r\n',
+            ),
+        )
 
 
 class TestSocketConnectionUtils(unittest.TestCase):
@@ -17,6 +17,7 @@ from proxy.http.exception.proxy_auth_failed import ProxyAuthenticationFailed
 from proxy.http.handler import HttpProtocolHandler
 from proxy.core.connection import TcpClientConnection
 from proxy.common.utils import build_http_request
+from ...utils import mock_recv_into
 
 
 class TestHttpProxyAuthFailed(unittest.TestCase):
@@ -35,6 +36,7 @@ class TestHttpProxyAuthFailed(unittest.TestCase):
         self._addr = ('127.0.0.1', 54382)
         self.flags = Proxy.initialize(["--basic-auth", "user:pass"])
         self._conn = mock_fromfd.return_value
+        self._conn.recv_into.side_effect = mock_recv_into(self._conn)
         self.protocol_handler = HttpProtocolHandler(
             TcpClientConnection(self._conn, self._addr),
             flags=self.flags,
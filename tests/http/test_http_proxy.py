@@ -19,6 +19,7 @@ from proxy.http.proxy import HttpProxyPlugin
 from proxy.http.handler import HttpProtocolHandler
 from proxy.http.exception import HttpProtocolException
 from proxy.common.utils import build_http_request
+from ..utils import mock_recv_into
 
 
 class TestHttpProxyPlugin(unittest.TestCase):
@@ -42,6 +43,7 @@ class TestHttpProxyPlugin(unittest.TestCase):
             b'HttpProxyBasePlugin': [self.plugin],
         }
         self._conn = mock_fromfd.return_value
+        self._conn.recv_into.side_effect = mock_recv_into(self._conn)
         self.protocol_handler = HttpProtocolHandler(
             TcpClientConnection(self._conn, self._addr),
             flags=self.flags,
@@ -21,13 +21,13 @@ from proxy.core.connection import TcpClientConnection, TcpServerConnection
 from proxy.http.handler import HttpProtocolHandler
 from proxy.http.proxy import HttpProxyPlugin
 from proxy.http.methods import httpMethods
-from proxy.common.utils import build_http_request, bytes_
+from proxy.common.utils import build_http_request, bytes_, _server_ssl_context
 from proxy.proxy import Proxy
+from ..utils import mock_recv_into
 
 
 class TestHttpProxyTlsInterception(unittest.TestCase):
 
-    @mock.patch('ssl.wrap_socket')
     @mock.patch('ssl.create_default_context')
     @mock.patch('proxy.http.proxy.server.TcpServerConnection')
     @mock.patch('proxy.http.proxy.server.gen_public_key')
@@ -44,8 +44,12 @@ class TestHttpProxyTlsInterception(unittest.TestCase):
             mock_gen_public_key: mock.Mock,
             mock_server_conn: mock.Mock,
             mock_ssl_context: mock.Mock,
-            mock_ssl_wrap: mock.Mock,
     ) -> None:
+        # Contexts are cached per (keyfile, certfile); start from a
+        # clean slate so this test sees its own mocked context.
+        _server_ssl_context.cache_clear()
+        HttpProxyPlugin._cert_cache.clear()
+        HttpProxyPlugin._cert_locks.clear()
         host, port = uuid.uuid4().hex, 443
         netloc = '{0}:{1}'.format(host, port)
 
@@ -56,15 +60,19 @@ class TestHttpProxyTlsInterception(unittest.TestCase):
         self.mock_gen_public_key = mock_gen_public_key
         self.mock_server_conn = mock_server_conn
         self.mock_ssl_context = mock_ssl_context
-        self.mock_ssl_wrap = mock_ssl_wrap
 
         self.mock_sign_csr.return_value = True
         self.mock_gen_csr.return_value = True
         self.mock_gen_public_key.return_value = True
 
         ssl_connection = mock.MagicMock(spec=ssl.SSLSocket)
-        self.mock_ssl_context.return_value.wrap_socket.return_value = ssl_connection
-        self.mock_ssl_wrap.return_value = mock.MagicMock(spec=ssl.SSLSocket)
+        client_tls_connection = mock.MagicMock(spec=ssl.SSLSocket)
+
+        def mock_wrap_socket(conn: Any, **kwargs: Any) -> Any:
+            return client_tls_connection \
+                if kwargs.get('server_side') else ssl_connection
+
+        self.mock_ssl_context.return_value.wrap_socket.side_effect = mock_wrap_socket
         plain_connection = mock.MagicMock(spec=socket.socket)
 
         def mock_connection() -> Any:
@@ -95,6 +103,7 @@ class TestHttpProxyTlsInterception(unittest.TestCase):
             b'HttpProxyBasePlugin': [self.proxy_plugin],
         }
         self._conn = mock_fromfd.return_value
+        self._conn.recv_into.side_effect = mock_recv_into(self._conn)
         self.protocol_handler = HttpProtocolHandler(
             TcpClientConnection(self._conn, self._addr),
             flags=self.flags,
@@ -166,14 +175,14 @@ class TestHttpProxyTlsInterception(unittest.TestCase):
             False,
         )
 
-        self.mock_ssl_context.assert_called_with(
+        self.mock_ssl_context.assert_any_call(
             ssl.Purpose.SERVER_AUTH, cafile=None,
         )
         # self.assertEqual(self.mock_ssl_context.return_value.options,
         # ssl.OP_NO_SSLv2 | ssl.OP_NO_SSLv3 | ssl.OP_NO_TLSv1 |
         # ssl.OP_NO_TLSv1_1)
         self.assertEqual(plain_connection.setblocking.call_count, 2)
-        self.mock_ssl_context.return_value.wrap_socket.assert_called_with(
+        self.mock_ssl_context.return_value.wrap_socket.assert_any_call(
             plain_connection, server_hostname=host,
         )
         self.assertEqual(self.mock_sign_csr.call_count, 1)
@@ -188,27 +197,30 @@ class TestHttpProxyTlsInterception(unittest.TestCase):
             HttpProxyPlugin.PROXY_TUNNEL_ESTABLISHED_RESPONSE_PKT,
         )
         assert self.flags.ca_cert_dir is not None
-        self.mock_ssl_wrap.assert_called_with(
-            self._conn,
-            server_side=True,
-            keyfile=self.flags.ca_signing_key_file,
+        self.mock_ssl_context.assert_any_call(
+            ssl.Purpose.CLIENT_AUTH,
+        )
+        self.mock_ssl_context.return_value.load_cert_chain.assert_called_with(
             certfile=HttpProxyPlugin.generated_cert_file_path(
                 self.flags.ca_cert_dir, host,
             ),
-            ssl_version=ssl.PROTOCOL_TLS,
+            keyfile=self.flags.ca_signing_key_file,
+        )
+        self.mock_ssl_context.return_value.wrap_socket.assert_called_with(
+            self._conn, server_side=True,
         )
         self.assertEqual(self._conn.setblocking.call_count, 2)
         self.assertEqual(
             self.protocol_handler.client.connection,
-            self.mock_ssl_wrap.return_value,
+            client_tls_connection,
         )
 
         # Assert connection references for all other plugins is updated
         self.assertEqual(
             self.plugin.return_value.client._conn,
-            self.mock_ssl_wrap.return_value,
+            client_tls_connection,
         )
         self.assertEqual(
             self.proxy_plugin.return_value.client._conn,
-            self.mock_ssl_wrap.return_value,
+            client_tls_connection,
         )
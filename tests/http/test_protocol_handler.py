@@ -25,6 +25,7 @@ from proxy.http.proxy import HttpProxyPlugin
 from proxy.http.parser import httpParserStates, httpParserTypes
 from proxy.http.exception import ProxyAuthenticationFailed, ProxyConnectionFailed
 from proxy.http.handler import HttpProtocolHandler
+from ..utils import mock_recv_into
 
 
 class TestHttpProtocolHandler(unittest.TestCase):
@@ -39,6 +40,7 @@ class TestHttpProtocolHandler(unittest.TestCase):
         self.fileno = 10
         self._addr = ('127.0.0.1', 54382)
         self._conn = mock_fromfd.return_value
+        self._conn.recv_into.side_effect = mock_recv_into(self._conn)
 
         self.http_server_port = 65535
         self.flags = Proxy.initialize()
@@ -208,6 +210,7 @@ class TestHttpProtocolHandler(unittest.TestCase):
             mock_selector: mock.Mock,
     ) -> None:
         self._conn = mock_fromfd.return_value
+        self._conn.recv_into.side_effect = mock_recv_into(self._conn)
         self.mock_selector_for_client_read(mock_selector)
         flags = Proxy.initialize(
             auth_code=base64.b64encode(b'user:pass'),
@@ -241,6 +244,7 @@ class TestHttpProtocolHandler(unittest.TestCase):
             mock_selector: mock.Mock,
     ) -> None:
         self._conn = mock_fromfd.return_value
+        self._conn.recv_into.side_effect = mock_recv_into(self._conn)
         self.mock_selector_for_client_read(mock_selector)
 
         server = mock_server_connection.return_value
@@ -298,6 +302,7 @@ class TestHttpProtocolHandler(unittest.TestCase):
         server.connect.return_value = True
         server.buffer_size.return_value = 0
         self._conn = mock_fromfd.return_value
+        self._conn.recv_into.side_effect = mock_recv_into(self._conn)
         self.mock_selector_for_client_read_read_server_write(
             mock_selector, server,
         )
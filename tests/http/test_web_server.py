@@ -22,6 +22,7 @@ from proxy.http.parser import httpParserStates
 from proxy.common.utils import build_http_response, build_http_request, bytes_, text_
 from proxy.common.constants import CRLF, PLUGIN_HTTP_PROXY, PLUGIN_PAC_FILE, PLUGIN_WEB_SERVER, PROXY_PY_DIR
 from proxy.http.server import HttpWebServerPlugin
+from ..utils import mock_recv_into
 
 
 class TestWebServerPlugin(unittest.TestCase):
@@ -32,6 +33,7 @@ class TestWebServerPlugin(unittest.TestCase):
         self.fileno = 10
         self._addr = ('127.0.0.1', 54382)
         self._conn = mock_fromfd.return_value
+        self._conn.recv_into.side_effect = mock_recv_into(self._conn)
         self.mock_selector = mock_selector
         self.flags = Proxy.initialize()
         self.flags.plugins = Proxy.load_plugins([
@@ -55,6 +57,7 @@ class TestWebServerPlugin(unittest.TestCase):
             'proxy.pac',
         )
         self._conn = mock_fromfd.return_value
+        self._conn.recv_into.side_effect = mock_recv_into(self._conn)
         self.mock_selector_for_client_read(mock_selector)
         self.init_and_make_pac_file_request(pac_file)
         self.protocol_handler.run_once()
@@ -78,6 +81,7 @@ class TestWebServerPlugin(unittest.TestCase):
             self, mock_fromfd: mock.Mock, mock_selector: mock.Mock,
     ) -> None:
         self._conn = mock_fromfd.return_value
+        self._conn.recv_into.side_effect = mock_recv_into(self._conn)
         self.mock_selector_for_client_read(mock_selector)
         pac_file_content = b'function FindProxyForURL(url, host) { return "PROXY localhost:8899; DIRECT"; }'
         self.init_and_make_pac_file_request(text_(pac_file_content))
@@ -101,6 +105,7 @@ class TestWebServerPlugin(unittest.TestCase):
             self, mock_fromfd: mock.Mock, mock_selector: mock.Mock,
     ) -> None:
         self._conn = mock_fromfd.return_value
+        self._conn.recv_into.side_effect = mock_recv_into(self._conn)
         mock_selector.return_value.select.return_value = [
             (
                 selectors.SelectorKey(
@@ -154,6 +159,7 @@ class TestWebServerPlugin(unittest.TestCase):
             f.write(html_file_content)
 
         self._conn = mock_fromfd.return_value
+        self._conn.recv_into.side_effect = mock_recv_into(self._conn)
         self._conn.recv.return_value = build_http_request(
             b'GET', b'/index.html',
         )
@@ -221,6 +227,7 @@ class TestWebServerPlugin(unittest.TestCase):
             mock_selector: mock.Mock,
     ) -> None:
         self._conn = mock_fromfd.return_value
+        self._conn.recv_into.side_effect = mock_recv_into(self._conn)
         self._conn.recv.return_value = build_http_request(
             b'GET', b'/not-found.html',
         )
@@ -276,6 +283,7 @@ class TestWebServerPlugin(unittest.TestCase):
         plugin = mock.MagicMock()
         flags.plugins = {b'HttpProtocolHandlerPlugin': [plugin]}
         self._conn = mock_fromfd.return_value
+        self._conn.recv_into.side_effect = mock_recv_into(self._conn)
         self.protocol_handler = HttpProtocolHandler(
             TcpClientConnection(self._conn, self._addr),
             flags=flags,
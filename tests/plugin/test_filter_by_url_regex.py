@@ -0,0 +1,340 @@
+# -*- coding: utf-8 -*-
+"""
+    proxy.py
+    ~~~~~~~~
+    ⚡⚡⚡ Fast, Lightweight, Pluggable, TLS interception capable proxy server focused on
+    Network monitoring, controls & Application development, testing, debugging.
+
+    :copyright: (c) 2013-present by Abhinav Singh and contributors.
+    :license: BSD, see LICENSE for more details.
+"""
+import re
+import json
+import argparse
+import tempfile
+import unittest
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from unittest import mock
+
+from proxy.http.parser import HttpParser
+from proxy.http.exception import HttpRequestRejected
+from proxy.plugin import filter_by_url_regex
+from proxy.plugin.filter_by_url_regex import (
+    FilterByURLRegexPlugin,
+    _FilterIndex,
+    _host_suffix,
+    _required_literal,
+    _strip_redundant_affixes,
+)
+
+
+class TestStripRedundantAffixes(unittest.TestCase):
+
+    def test_strips_unanchored_affixes(self) -> None:
+        self.assertEqual(
+            _strip_redundant_affixes(b'.*tracker\\.com/.*'),
+            b'tracker\\.com/',
+        )
+
+    def test_keeps_lazy_and_quantified_prefixes(self) -> None:
+        self.assertEqual(
+            _strip_redundant_affixes(b'.*?tracker'), b'.*?tracker',
+        )
+
+    def test_keeps_suffix_after_escape(self) -> None:
+        self.assertEqual(
+            _strip_redundant_affixes(b'tracker\\.*'), b'tracker\\.*',
+        )
+
+    def test_pure_wildcard_survives(self) -> None:
+        self.assertEqual(_strip_redundant_affixes(b'.*'), b'.*')
+
+    def test_stripped_pattern_is_search_equivalent(self) -> None:
+        original = b'.*tpc.googlesyndication.com/simgad/.*'
+        stripped = _strip_redundant_affixes(original)
+        for url in (
+                b'tpc.googlesyndication.com/simgad/123',
+                b'tpc.googlesyndication.com/other',
+        ):
+            self.assertEqual(
+                re.search(original, url) is not None,
+                re.search(stripped, url) is not None,
+            )
+
+
+class TestRequiredLiteral(unittest.TestCase):
+
+    def test_explicit_literal_key_wins(self) -> None:
+        self.assertEqual(
+            _required_literal({'literal': 'simgad'}, b'whatever'),
+            b'simgad',
+        )
+
+    def test_escaped_class_does_not_leak(self) -> None:
+        # \d used to split at the backslash only, deriving the bogus
+        # literal b'dpixelimage' and skipping matching URLs.
+        self.assertEqual(
+            _required_literal({}, b'track\\dpixelimage'),
+            b'pixelimage',
+        )
+
+    def test_escaped_punctuation_is_literal(self) -> None:
+        self.assertEqual(
+            _required_literal({}, b'ads\\.example\\.com/track'),
+            b'ads.example.com/track',
+        )
+
+    def test_quantifier_drops_optional_character(self) -> None:
+        # The u is optional; the literal must not include it.
+        self.assertEqual(
+            _required_literal({}, b'colou?rtracker'), b'rtracker',
+        )
+
+    def test_no_literal_for_alternation_or_groups(self) -> None:
+        self.assertIsNone(_required_literal({}, b'(www)?\\.ads\\.com/x'))
+        self.assertIsNone(_required_literal({}, b'foo|barbazquux'))
+
+    def test_derived_literal_is_required(self) -> None:
+        # Property the prefilter relies upon: any URL matched by the
+        # pattern must contain the derived literal.
+        patterns = [
+            b'track\\dpixelimage',
+            b'pixel[0-9]tracker',
+            b'ab{2}cdefg/img\\.gif',
+            b'colou?rtracker',
+        ]
+        urls = [
+            b'x.com/track5pixelimage',
+            b'y.net/pixel7tracker',
+            b'abbcdefg/img.gif',
+            b'z.org/colortracker?1',
+        ]
+        for pat_bytes in patterns:
+            literal = _required_literal({}, pat_bytes)
+            self.assertIsNotNone(literal)
+            assert literal is not None
+            for url in urls:
+                if re.search(pat_bytes, url):
+                    self.assertIn(literal, url)
+
+
+class TestHostSuffix(unittest.TestCase):
+
+    def test_drops_possibly_partial_leftmost_label(self) -> None:
+        # tpc can match mid-label (xtpc.googlesyndication.com), only
+        # the dot-anchored labels are trustworthy.
+        self.assertEqual(
+            _host_suffix(b'tpc.googlesyndication.com/simgad/'),
+            b'googlesyndication.com',
+        )
+
+    def test_keeps_labels_behind_non_plain_label(self) -> None:
+        self.assertEqual(
+            _host_suffix(b'pagead\\d+.googlesyndication.com/'),
+            b'googlesyndication.com',
+        )
+        self.assertEqual(
+            _host_suffix(b'.2mdn.net/videoplayback/'), b'2mdn.net',
+        )
+
+    def test_no_index_without_slash(self) -> None:
+        self.assertIsNone(_host_suffix(b'ads\\.example\\.com'))
+
+    def test_no_index_for_alternation_in_anchor(self) -> None:
+        self.assertIsNone(_host_suffix(b'ads|track\\.example\\.com/x'))
+
+    def test_two_label_anchor_keys_under_tld(self) -> None:
+        # example may match mid-label, only com is trustworthy; hosts
+        # always probe their last label, so the bucket is still found.
+        self.assertEqual(_host_suffix(b'example.com/x'), b'com')
+
+    def test_no_index_without_trustworthy_label(self) -> None:
+        self.assertIsNone(_host_suffix(b'[a-z]+/x'))
+
+
+class TestFilterIndex(unittest.TestCase):
+    """Drives _FilterIndex.match against the baseline per-rule loop."""
+
+    rules: List[Dict[str, Any]] = [
+        {'regex': 'tpc.googlesyndication.com/simgad/.*'},
+        {'regex': '(www){0,1}.facebook.com/tr/.*'},
+        # Backreference; must be matched standalone, packing it into
+        # an alternation shifts its group numbers.
+        {'regex': '(ad)s\\1server\\.com/x.*'},
+        # Named group; two of these in one alternation collide.
+        {'regex': '(?P<h>trk)\\.example\\.com/.*'},
+        {'regex': '(?P<h>img)\\.example\\.org/.*'},
+        # Duplicate of rule 1; deduplicated, rule 1 wins.
+        {'regex': 'tpc.googlesyndication.com/simgad/.*'},
+        {'regex': 'track\\dpixelimage\\.gif'},
+    ]
+
+    urls = [
+        (b'tpc.googlesyndication.com', b'/simgad/123'),
+        (b'xtpc.googlesyndication.com', b'/simgad/123'),
+        (b'www.facebook.com', b'/tr/'),
+        (b'adsadserver.com', b'/x1'),
+        (b'trk.example.com', b'/p'),
+        (b'img.example.org', b'/p'),
+        (b'x.com', b'/track5pixelimage.gif'),
+        (b'example.com', b'/index.html'),
+        (b'facebook.com.evil.net', b'/tr/'),
+    ]
+
+    def setUp(self) -> None:
+        self.config = tempfile.NamedTemporaryFile(
+            mode='w', suffix='.json', delete=False,
+        )
+        json.dump(self.rules, self.config)
+        self.config.close()
+        self.index = _FilterIndex(self.config.name)
+        self.baseline = [
+            re.compile(rule['regex'].encode()) for rule in self.rules
+        ]
+
+    def tearDown(self) -> None:
+        Path(self.config.name).unlink()
+
+    def naive_match(self, url: bytes) -> Optional[int]:
+        for rule_number, pattern in enumerate(self.baseline, start=1):
+            if pattern.search(url):
+                return rule_number
+        return None
+
+    def test_parity_with_baseline_loop(self) -> None:
+        for host, path in self.urls:
+            url = host + path
+            self.assertEqual(
+                self.index.match(host, url),
+                self.naive_match(url),
+                url,
+            )
+
+    def test_empty_config_matches_nothing(self) -> None:
+        index = _FilterIndex('')
+        self.assertIsNone(index.match(b'example.com', b'example.com/'))
+
+    def test_reorder_preserves_decisions(self) -> None:
+        self.index._reorder()
+        self.test_parity_with_baseline_loop()
+
+
+class _StubScanTerminated(Exception):
+    pass
+
+
+class _StubHyperscanDatabase:
+    """Mimics python-hyperscan closely enough for _FilterIndex: a
+    match handler returning non-zero makes scan raise ScanTerminated
+    rather than return."""
+
+    def __init__(self) -> None:
+        self.expressions: List[bytes] = []
+        self.ids: List[int] = []
+
+    def compile(
+            self, expressions: List[bytes],
+            ids: List[int], flags: List[int],
+    ) -> None:
+        self.expressions = expressions
+        self.ids = ids
+
+    def scan(self, url: bytes, match_event_handler: Any) -> None:
+        for pat_bytes, rule_id in zip(self.expressions, self.ids):
+            if re.search(pat_bytes, url) and \
+                    match_event_handler(rule_id, 0, 0, 0, None) != 0:
+                raise _StubScanTerminated()
+
+
+def _stub_hyperscan() -> Any:
+    stub = mock.MagicMock()
+    stub.Database = _StubHyperscanDatabase
+    stub.HS_FLAG_SINGLEMATCH = 8
+    stub.ScanTerminated = _StubScanTerminated
+    stub.error = _StubScanTerminated
+    return stub
+
+
+class TestFilterIndexWithHyperscan(TestFilterIndex):
+    """Re-runs the parity suite through the hyperscan scan branch.
+
+    Regression: a handler-terminated scan raises out of Database.scan
+    and previously escaped match as an unhandled exception for every
+    URL that should be blocked."""
+
+    def setUp(self) -> None:
+        self._patcher = mock.patch.object(
+            filter_by_url_regex, 'hyperscan', _stub_hyperscan(),
+        )
+        self._patcher.start()
+        super().setUp()
+
+    def tearDown(self) -> None:
+        self._patcher.stop()
+        super().tearDown()
+
+    def test_scan_branch_is_active(self) -> None:
+        self.assertIsNotNone(self.index._hs_db)
+
+
+class TestFilterByURLRegexPlugin(unittest.TestCase):
+
+    def setUp(self) -> None:
+        filter_by_url_regex._decision_cache.clear()
+        filter_by_url_regex._index_cache.clear()
+        self.config_path = str(
+            Path(__file__).parent.parent.parent /
+            'proxy' / 'plugin' / 'adblock.json',
+        )
+        self.plugin = FilterByURLRegexPlugin(
+            mock.MagicMock(),
+            argparse.Namespace(
+                filtered_url_regex_config=self.config_path,
+            ),
+            mock.MagicMock(),
+            mock.MagicMock(),
+        )
+
+    @staticmethod
+    def request(host: bytes, path: bytes) -> HttpParser:
+        return HttpParser.request(
+            b'GET http://' + host + path + b' HTTP/1.1\r\n' +
+            b'Host: ' + host + b'\r\n\r\n',
+        )
+
+    def test_blocks_filtered_url(self) -> None:
+        with self.assertRaises(HttpRequestRejected):
+            self.plugin.handle_client_request(
+                self.request(b'www.facebook.com', b'/tr/'),
+            )
+
+    def test_allows_unfiltered_url(self) -> None:
+        request = self.request(b'example.com', b'/index.html')
+        self.assertIs(
+            self.plugin.handle_client_request(request), request,
+        )
+
+    def test_decision_is_cached(self) -> None:
+        self.plugin._index = mock.MagicMock()
+        self.plugin._index.match.return_value = None
+        for _ in range(2):
+            self.plugin.handle_client_request(
+                self.request(b'example.com', b'/index.html'),
+            )
+        self.assertEqual(self.plugin._index.match.call_count, 1)
+
+    def test_cache_evicts_least_recently_used(self) -> None:
+        with mock.patch.object(
+                filter_by_url_regex, '_DECISION_CACHE_SIZE', 2,
+        ):
+            for path in (b'/a', b'/b', b'/c'):
+                self.plugin.handle_client_request(
+                    self.request(b'example.com', path),
+                )
+        self.assertEqual(len(filter_by_url_regex._decision_cache), 2)
+        self.assertNotIn(
+            (self.config_path, b'example.com', b'/a'),
+            filter_by_url_regex._decision_cache,
+        )
@@ -28,6 +28,7 @@ from proxy.http.codes import httpStatusCodes
 from proxy.plugin import ProposedRestApiPlugin, RedirectToCustomServerPlugin
 
 from .utils import get_plugin_by_test_name
+from ..utils import mock_recv_into, mock_tcp_conn_recv_into
 
 
 class TestHttpProxyPluginExamples(unittest.TestCase):
@@ -62,6 +63,7 @@ class TestHttpProxyPluginExamples(unittest.TestCase):
             b'HttpProxyBasePlugin': [plugin],
         }
         self._conn = mock_fromfd.return_value
+        self._conn.recv_into.side_effect = mock_recv_into(self._conn)
         self.protocol_handler = HttpProtocolHandler(
             TcpClientConnection(self._conn, self._addr),
             flags=self.flags,
@@ -303,6 +305,7 @@ class TestHttpProxyPluginExamples(unittest.TestCase):
                 httpStatusCodes.OK,
                 reason=b'OK', body=b'Original Response From Upstream',
             )
+        server.recv_into.side_effect = mock_tcp_conn_recv_into(server)
         self.protocol_handler.run_once()
         self.assertEqual(
             self.protocol_handler.client.buffer[0].tobytes(),
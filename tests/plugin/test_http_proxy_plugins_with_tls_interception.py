@@ -18,7 +18,7 @@ from typing import Any, cast
 
 from proxy.proxy import Proxy
 from proxy.common.utils import bytes_
-from proxy.common.utils import build_http_request, build_http_response
+from proxy.common.utils import build_http_request, build_http_response, _server_ssl_context
 from proxy.core.connection import TcpClientConnection, TcpServerConnection
 from proxy.http.codes import httpStatusCodes
 from proxy.http.methods import httpMethods
@@ -26,11 +26,11 @@ from proxy.http.handler import HttpProtocolHandler
 from proxy.http.proxy import HttpProxyPlugin
 
 from .utils import get_plugin_by_test_name
+from ..utils import mock_recv_into, mock_tcp_conn_recv_into
 
 
 class TestHttpProxyPluginExamplesWithTlsInterception(unittest.TestCase):
 
-    @mock.patch('ssl.wrap_socket')
     @mock.patch('ssl.create_default_context')
     @mock.patch('proxy.http.proxy.server.TcpServerConnection')
     @mock.patch('proxy.http.proxy.server.gen_public_key')
@@ -47,8 +47,12 @@ class TestHttpProxyPluginExamplesWithTlsInterception(unittest.TestCase):
         mock_gen_public_key: mock.Mock,
         mock_server_conn: mock.Mock,
         mock_ssl_context: mock.Mock,
-        mock_ssl_wrap: mock.Mock,
     ) -> None:
+        # Contexts are cached per (keyfile, certfile); start from a
+        # clean slate so each test sees its own mocked context.
+        _server_ssl_context.cache_clear()
+        HttpProxyPlugin._cert_cache.clear()
+        HttpProxyPlugin._cert_locks.clear()
         self.mock_fromfd = mock_fromfd
         self.mock_selector = mock_selector
         self.mock_sign_csr = mock_sign_csr
@@ -56,7 +60,6 @@ class TestHttpProxyPluginExamplesWithTlsInterception(unittest.TestCase):
         self.mock_gen_public_key = mock_gen_public_key
         self.mock_server_conn = mock_server_conn
         self.mock_ssl_context = mock_ssl_context
-        self.mock_ssl_wrap = mock_ssl_wrap
 
         self.mock_sign_csr.return_value = True
         self.mock_gen_csr.return_value = True
@@ -78,6 +81,7 @@ class TestHttpProxyPluginExamplesWithTlsInterception(unittest.TestCase):
             b'HttpProxyBasePlugin': [plugin],
         }
         self._conn = mock.MagicMock(spec=socket.socket)
+        self._conn.recv_into.side_effect = mock_recv_into(self._conn)
         mock_fromfd.return_value = self._conn
         self.protocol_handler = HttpProtocolHandler(
             TcpClientConnection(self._conn, self._addr), flags=self.flags,
@@ -87,9 +91,14 @@ class TestHttpProxyPluginExamplesWithTlsInterception(unittest.TestCase):
         self.server = self.mock_server_conn.return_value
 
         self.server_ssl_connection = mock.MagicMock(spec=ssl.SSLSocket)
-        self.mock_ssl_context.return_value.wrap_socket.return_value = self.server_ssl_connection
         self.client_ssl_connection = mock.MagicMock(spec=ssl.SSLSocket)
-        self.mock_ssl_wrap.return_value = self.client_ssl_connection
+        self.client_ssl_connection.recv_into.side_effect = mock_recv_into(self.client_ssl_connection)
+
+        def mock_wrap_socket(conn: Any, **kwargs: Any) -> Any:
+            return self.client_ssl_connection \
+                if kwargs.get('server_side') else self.server_ssl_connection
+
+        self.mock_ssl_context.return_value.wrap_socket.side_effect = mock_wrap_socket
 
         def has_buffer() -> bool:
             return cast(bool, self.server.queue.called)
@@ -227,6 +236,8 @@ class TestHttpProxyPluginExamplesWithTlsInterception(unittest.TestCase):
                 httpStatusCodes.OK,
                 reason=b'OK', body=b'Original Response From Upstream',
             )
+        self.server.recv_into.side_effect = \
+            mock_tcp_conn_recv_into(self.server)
         self.protocol_handler.run_once()
         self.assertEqual(
             self.protocol_handler.client.buffer[0].tobytes(),
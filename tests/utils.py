@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""
+    proxy.py
+    ~~~~~~~~
+    ⚡⚡⚡ Fast, Lightweight, Pluggable, TLS interception capable proxy server focused on
+    Network monitoring, controls & Application development, testing, debugging.
+
+    :copyright: (c) 2013-present by Abhinav Singh and contributors.
+    :license: BSD, see LICENSE for more details.
+"""
+from typing import Callable, Optional
+from unittest import mock
+
+
+def mock_recv_into(conn: mock.Mock) -> Callable[[bytearray], int]:
+    """Returns a recv_into side_effect which mirrors conn.recv.return_value.
+
+    Allows tests to keep configuring mocked sockets via recv.return_value
+    while production code reads via the recv_into code path."""
+    def recv_into(buf: bytearray) -> int:
+        data = conn.recv.return_value
+        buf[:len(data)] = data
+        return len(data)
+    return recv_into
+
+
+def mock_tcp_conn_recv_into(
+        conn: mock.Mock,
+) -> Callable[[bytearray], Optional[memoryview]]:
+    """Same as mock_recv_into, but for mocked TcpConnection objects,
+    whose recv_into returns Optional[memoryview] instead of a count."""
+    def recv_into(buf: bytearray) -> Optional[memoryview]:
+        data = conn.recv.return_value
+        if data is None:
+            return None
+        buf[:len(data)] = data
+        return memoryview(buf)[:len(data)]
+    return recv_into